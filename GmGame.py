@@ -5,7 +5,7 @@ import sys
 import time
 
 import numpy as np
-from pygame.locals import KEYUP, QUIT, MOUSEBUTTONUP, K_ESCAPE
+from pygame.locals import KEYUP, QUIT, MOUSEBUTTONUP, K_ESCAPE, WINDOWEXPOSED
 
 from GmGameRules import GmGameRules
 from GmUtils import GmUtils
@@ -48,16 +48,30 @@ class GmGame:
 
     FPSCLOCK = None
 
+    # Rendering bookkeeping: only the cells that changed since the previous frame are redrawn,
+    # and only their rectangles are passed to pygame.display.update.
+    BACKGROUNDSURF = None  # the empty board incl. margins, rendered once
+    DRAWNBOARD = None  # the board as it is currently on the screen (None: redraw everything)
+    DRAWNEXTRATOKENS = []  # (token,row,col) of the markers currently on the screen
+    OVERLAYRECTS = []  # rects of images (e.g. winner image) on top of the board
+    DIRTYRECTS = []  # the screen areas that changed since the last updateDisplay()
+
     # if you want to test an ai game maximally quickly, you could disable showIntermediateMoves
     # player1 will be set to black.
     # player2 wil be set to white
     def start(player1, player2, max_time_to_move, showIntermediateMoves=True):
-        GmGame.XMARGIN = int(
-            (GmGame.WINDOWWIDTH - GmGameRules.BOARDWIDTH * GmGame.SPACESIZE) / 2
-        )
-        GmGame.YMARGIN = int(
-            (GmGame.WINDOWHEIGHT - GmGameRules.BOARDHEIGHT * GmGame.SPACESIZE) / 2
-        )
+        GmGame.initDisplay()
+
+        while True:
+            player1.new_game(
+                True
+            )  # to avoid inconsistencies, I define player1 as black player and player 2 as white player.
+            player2.new_game(False)
+            GmGame.runGame(player1, player2, max_time_to_move, showIntermediateMoves)
+
+    # opens the window and loads the images
+    def initDisplay():
+        GmGame.setBoardSize(GmGameRules.BOARDWIDTH, GmGameRules.BOARDHEIGHT)
 
         global FPSCLOCK, DISPLAYSURF, WHITETOKENIMG
         global BLACKTOKENIMG, BOARDIMG, ARROWIMG, ARROWRECT, HUMANWINNERIMG
@@ -100,12 +114,18 @@ class GmGame:
         WINNERRECT.left = 0
         WINNERRECT.top = 0
 
-        while True:
-            player1.new_game(
-                True
-            )  # to avoid inconsistencies, I define player1 as black player and player 2 as white player.
-            player2.new_game(False)
-            GmGame.runGame(player1, player2, max_time_to_move, showIntermediateMoves)
+    # NB: changes GmGameRules, so only use it for displaying (e.g. replays of games on another board size)
+    def setBoardSize(width, height):
+        GmGameRules.BOARDWIDTH = width
+        GmGameRules.BOARDHEIGHT = height
+        GmGame.XMARGIN = int(
+            (GmGame.WINDOWWIDTH - GmGameRules.BOARDWIDTH * GmGame.SPACESIZE) / 2
+        )
+        GmGame.YMARGIN = int(
+            (GmGame.WINDOWHEIGHT - GmGameRules.BOARDHEIGHT * GmGame.SPACESIZE) / 2
+        )
+        GmGame.BACKGROUNDSURF = None
+        GmGame.invalidate()
 
     def runGame(
         player1,
@@ -160,18 +180,18 @@ class GmGame:
             activePlayer = GmUtils.getNonActivePlayer(activePlayer, player1, player2)
 
             if showIntermediateMoves:
-                pygame.display.update()
+                GmGame.updateDisplay()
                 GmGame.FPSCLOCK.tick()
 
+        GmGame.drawBoardWithExtraTokens(
+            mainBoard, last_move[0], last_move[1], GmGame.MARKER
+        )
+        GmGame.drawOverlay(winnerImg, WINNERRECT)
+        GmGame.updateDisplay()
         while True:
             # Keep looping until player clicks the mouse or quits.
-            GmGame.drawBoardWithExtraTokens(
-                mainBoard, last_move[0], last_move[1], GmGame.MARKER
-            )
-            DISPLAYSURF.blit(winnerImg, WINNERRECT)
-            pygame.display.update()
-            GmGame.FPSCLOCK.tick()
-            time.sleep(0.1)
+            # Nothing changes on the screen meanwhile, so there is nothing to redraw.
+            GmGame.FPSCLOCK.tick(GmGame.FPS)
             for event in pygame.event.get():  # event handling loop
                 if event.type == QUIT or (
                     event.type == KEYUP and event.key == K_ESCAPE
@@ -180,47 +200,71 @@ class GmGame:
                     sys.exit()
                 elif event.type == MOUSEBUTTONUP:
                     return
+                elif event.type == WINDOWEXPOSED:
+                    pygame.display.update()
+
+    def cellRect(row, col):
+        return pygame.Rect(
+            GmGame.XMARGIN + (col * GmGame.SPACESIZE),
+            GmGame.YMARGIN + (row * GmGame.SPACESIZE),
+            GmGame.SPACESIZE,
+            GmGame.SPACESIZE,
+        )
 
     # token can be BLACK, WHITE or MARKER
     def drawToken(token, row, col):
         if token != None:
-            spaceRect = pygame.Rect(0, 0, GmGame.SPACESIZE, GmGame.SPACESIZE)
-            spaceRect.topleft = (
-                GmGame.XMARGIN + (col * GmGame.SPACESIZE),
-                GmGame.YMARGIN + (row * GmGame.SPACESIZE),
-            )
+            spaceRect = GmGame.cellRect(row, col)
             if token == GmGame.WHITE:
                 DISPLAYSURF.blit(WHITETOKENIMG, spaceRect)
             elif token == GmGame.BLACK:
                 DISPLAYSURF.blit(BLACKTOKENIMG, spaceRect)
             elif token == GmGame.MARKER:
                 DISPLAYSURF.blit(MARKERIMG, spaceRect)
+            GmGame.DIRTYRECTS.append(spaceRect)
 
-    def drawBoard(board, extraToken=None):
-        DISPLAYSURF.fill(GmGame.BGCOLOR)
-
-        spaceRect = pygame.Rect(0, 0, GmGame.SPACESIZE, GmGame.SPACESIZE)
+    def clearCell(row, col):
+        # restore the empty board (or margin) under a cell
+        spaceRect = GmGame.cellRect(row, col)
+        DISPLAYSURF.blit(GmGame.BACKGROUNDSURF, spaceRect, spaceRect)
+        GmGame.DIRTYRECTS.append(spaceRect)
 
+    def renderBackground():
+        GmGame.BACKGROUNDSURF = pygame.Surface(DISPLAYSURF.get_size()).convert()
+        GmGame.BACKGROUNDSURF.fill(GmGame.BGCOLOR)
         # draw board under the tokens
         for row in range(GmGameRules.BOARDHEIGHT):
             for col in range(GmGameRules.BOARDWIDTH):
-                spaceRect.topleft = (
-                    GmGame.XMARGIN + (col * GmGame.SPACESIZE),
-                    GmGame.YMARGIN + (row * GmGame.SPACESIZE),
-                )
-                DISPLAYSURF.blit(BOARDIMG, spaceRect)
+                GmGame.BACKGROUNDSURF.blit(BOARDIMG, GmGame.cellRect(row, col))
 
-        # draw tokens
-        for row in range(GmGameRules.BOARDHEIGHT):
-            for col in range(GmGameRules.BOARDWIDTH):
-                spaceRect.topleft = (
-                    GmGame.XMARGIN + (col * GmGame.SPACESIZE),
-                    GmGame.YMARGIN + (row * GmGame.SPACESIZE),
-                )
-                if board[row][col] == GmGame.WHITE:
-                    DISPLAYSURF.blit(WHITETOKENIMG, spaceRect)
-                elif board[row][col] == GmGame.BLACK:
-                    DISPLAYSURF.blit(BLACKTOKENIMG, spaceRect)
+    def invalidate():
+        # forces the next drawBoard to redraw the whole screen
+        GmGame.DRAWNBOARD = None
+
+    def drawBoard(board, extraToken=None):
+        if GmGame.BACKGROUNDSURF is None:
+            GmGame.renderBackground()
+
+        if GmGame.OVERLAYRECTS:
+            GmGame.OVERLAYRECTS = []
+            GmGame.invalidate()
+
+        if GmGame.DRAWNBOARD is None:
+            DISPLAYSURF.blit(GmGame.BACKGROUNDSURF, (0, 0))
+            GmGame.DIRTYRECTS.append(DISPLAYSURF.get_rect())
+            GmGame.DRAWNBOARD = np.zeros(
+                (GmGameRules.BOARDHEIGHT, GmGameRules.BOARDWIDTH), dtype=np.int8
+            )
+            GmGame.DRAWNEXTRATOKENS = []
+
+        # only draw the tokens that changed since the previous call
+        board = np.asarray(board)
+        for row, col in zip(*np.nonzero(board != GmGame.DRAWNBOARD)):
+            GmGame.clearCell(row, col)
+            token = board[row][col]
+            if token == GmGame.WHITE or token == GmGame.BLACK:
+                GmGame.drawToken(token, row, col)
+            GmGame.DRAWNBOARD[row][col] = token
 
         # draw the extra token
         if extraToken != None:
@@ -228,13 +272,40 @@ class GmGame:
 
     def drawBoardWithExtraTokens(board, row=0, col=0, token1=None, token2=None):
         GmGame.drawBoard(board)
-        if token1 != None:
-            GmGame.drawToken(token1, row, -1)
-            GmGame.drawToken(token1, -1, col)
-
-        if token2 != None:
-            GmGame.drawToken(token2, row, -1)
-            GmGame.drawToken(token2, -1, col)
+        extraTokens = []
+        for token in (token1, token2):
+            if token != None:
+                extraTokens.append((token, row, -1))
+                extraTokens.append((token, -1, col))
+
+        # only move the markers when they changed
+        if extraTokens != GmGame.DRAWNEXTRATOKENS:
+            for _, tokenRow, tokenCol in GmGame.DRAWNEXTRATOKENS:
+                GmGame.clearCell(tokenRow, tokenCol)
+            for token, tokenRow, tokenCol in extraTokens:
+                GmGame.drawToken(token, tokenRow, tokenCol)
+            GmGame.DRAWNEXTRATOKENS = extraTokens
+
+    def drawOverlay(img, rect):
+        # draws an image on top of the board. It is removed at the next drawBoard.
+        DISPLAYSURF.blit(img, rect)
+        GmGame.OVERLAYRECTS.append(rect)
+        GmGame.DIRTYRECTS.append(rect)
+
+    # color can be BLACK, WHITE or None (a tie)
+    def drawWinner(color):
+        if color == GmGame.BLACK:
+            GmGame.drawOverlay(HUMANWINNERIMG, WINNERRECT)
+        elif color == GmGame.WHITE:
+            GmGame.drawOverlay(COMPUTERWINNERIMG, WINNERRECT)
+        else:
+            GmGame.drawOverlay(TIEWINNERIMG, WINNERRECT)
+
+    def updateDisplay():
+        # pushes the changed parts of the screen to the display
+        if GmGame.DIRTYRECTS:
+            pygame.display.update(GmGame.DIRTYRECTS)
+            GmGame.DIRTYRECTS = []
 
     def getNewBoard():
         return np.zeros(
@@ -0,0 +1,152 @@
+import copy
+import operator
+import random
+import time
+
+import numpy as np
+
+import gomoku
+from GmGameRules import GmGameRules
+from GmUtils import GmUtils
+
+
+# Plays games between two agents like GmGame does, but without any visualisation:
+# pygame is not needed, nothing is drawn and nothing waits for a mouse click.
+# Intended for running lots of quick ai-vs-ai (regression) games, e.g. on a server without a display.
+# The results are game records in the format of game_log.py, so they can be logged and analysed
+# (game_analysis.py) just like competition games.
+class GmHeadlessGame:
+    BLACK = 2
+    WHITE = 1
+
+    # player1 plays black in the even games (0, 2, ..), player2 in the odd games.
+    # Games where a player exceeds twice the tolerated time per move are lost by that player,
+    # just like in the competition.
+    def playGames(
+        player1,
+        player2,
+        max_time_to_move,
+        nofGames=2,
+        tolerance=0.05,
+        seed=0,
+        gameLog=None,
+    ):
+        records = []
+        for nGame in range(nofGames):
+            if nGame % 2 == 0:
+                black, white = player1, player2
+            else:
+                black, white = player2, player1
+            black.new_game(True)
+            white.new_game(False)
+            record = GmHeadlessGame.runGame(
+                black, white, max_time_to_move, tolerance, seed + nGame
+            )
+            if gameLog is not None:
+                gameLog.write_game(record)
+            records.append(record)
+        return records
+
+    def runGame(blackPlayer, whitePlayer, max_time_to_move, tolerance=0.05, seed=0):
+        record = {
+            "black": blackPlayer.id(),
+            "white": whitePlayer.id(),
+            "bsize": GmGameRules.BOARDWIDTH,
+            "seed": seed,
+            "maxtime_per_move": max_time_to_move,
+            "tolerance": tolerance,
+            "moves": [],
+            "times_ns": [],
+            "winner": None,
+            "reason": "",
+            "score": [0.0, 0.0],
+        }
+        max_time_ns = 2 * max_time_to_move * (1.0 + tolerance) * 1000000
+
+        random.seed(seed)  # for reproducible games
+
+        last_move = ()
+        ply = 1
+        activePlayer = blackPlayer
+        mainBoard = np.zeros(
+            (GmGameRules.BOARDWIDTH, GmGameRules.BOARDHEIGHT), dtype=np.int8
+        )
+        nofCells = GmGameRules.BOARDWIDTH * GmGameRules.BOARDHEIGHT
+
+        while True:
+            colour = 0 if activePlayer is blackPlayer else 1  # index in record["score"]
+            # make deepcopy to avoid ai's that erroneously modify the gamestate can manipulate the official board.
+            gamestate = (copy.deepcopy(mainBoard), ply)
+            start_time = time.time_ns()
+            try:
+                move = activePlayer.move(gamestate, last_move, max_time_to_move)
+            except Exception:
+                move = None
+                record["reason"] = "exception"
+            time_ns = time.time_ns() - start_time
+
+            if record["reason"] == "":
+                # None, or not even a (row, col) of integers, is an illegal move too (as in the competition).
+                # A list, like [3, 3] from json, is fine.
+                try:
+                    if len(move) != 2:
+                        raise TypeError("not a move")
+                    move = (operator.index(move[0]), operator.index(move[1]))
+                    bLegal = GmUtils.isValidMove(mainBoard, move[0], move[1]) and (
+                        ply != 1 or move == tuple(GmUtils.getValidMoves(mainBoard, 1)[0])
+                    )
+                except (TypeError, IndexError):
+                    bLegal = False
+                if not bLegal:
+                    record["reason"] = "illegal"
+                elif time_ns > max_time_ns:
+                    record["reason"] = "overtime"
+
+            if record["reason"] != "":
+                # disqualified: penalised, the opponent is considered the winner.
+                record["score"][colour] -= 1
+                record["winner"] = "white" if colour == 0 else "black"
+                return record
+
+            last_move = move
+            record["moves"].append(list(last_move))
+            record["times_ns"].append(time_ns)
+            GmUtils.addMoveToBoard(
+                mainBoard,
+                last_move,
+                GmHeadlessGame.BLACK if colour == 0 else GmHeadlessGame.WHITE,
+            )
+
+            # exactly five, as gomoku.check_win in the competition: the records are analysed together
+            if gomoku.check_win(mainBoard, last_move):
+                record["score"][colour] += 1
+                record["winner"] = "black" if colour == 0 else "white"
+                record["reason"] = "win"
+                return record
+            elif ply == nofCells:
+                # A completely filled board means it's a tie.
+                record["score"] = [0.5, 0.5]
+                record["reason"] = "draw"
+                return record
+
+            ply += 1
+            activePlayer = GmUtils.getNonActivePlayer(
+                activePlayer, blackPlayer, whitePlayer
+            )
+
+    def printResults(records):
+        """Prints per player the number of wins, draws and losses in records."""
+        scores = {}
+        for record in records:
+            for colour, player in enumerate((record["black"], record["white"])):
+                score = scores.setdefault(player, [0, 0, 0])
+                if record["winner"] is None:
+                    score[1] += 1
+                elif record["winner"] == ("black" if colour == 0 else "white"):
+                    score[0] += 1
+                else:
+                    score[2] += 1
+        for player, (wins, draws, losses) in scores.items():
+            print(
+                "{}: wins={} draws={} losses={}".format(player, wins, draws, losses)
+            )
@@ -0,0 +1,146 @@
+import importlib
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GmQuickTests import QUICKTESTS, GmQuickTests
+
+
+# Runs the GmQuickTests many times, in parallel, without printing the boards.
+# An mcts ai is stochastic: a single pass or fail of a test says little. The runner runs every test
+# (in both colors, if the test allows it) nofRuns times with different seeds, over a pool of
+# processes, and reports the pass rate per test with its 95% confidence interval
+# and the time the ai took for the correct moves.
+#
+# usage: python GmQuickTestRunner.py --player super_ai.super_ai:super_ai --runs 20 --time 1000
+# or, in python: GmQuickTestRunner.printResults(GmQuickTestRunner.runAll(super_ai, nofRuns=20))
+class GmQuickTestRunner:
+    # runs in a worker process. playerFactory is a class (or other picklable callable) that creates the ai.
+    def runTrial(playerFactory, name, bToggleColors, seed, max_time_to_move):
+        case = QUICKTESTS[name]
+        gamestate, last_move, bIamBlack = GmQuickTests.prepareTest(
+            GmQuickTests.caseGamestate(case),
+            case["last_move_oppWhite"],
+            case["last_move_oppBlack"],
+            bToggleColors,
+        )
+        GmQuickTests.useBoardSize(len(gamestate[0]))
+
+        bPassed, elapsed_ms = GmQuickTestRunner.tryMove(
+            playerFactory, gamestate, last_move, bIamBlack, case["goodMoves"], seed, max_time_to_move
+        )
+        return name, bIamBlack, bPassed, elapsed_ms
+
+    def tryMove(playerFactory, gamestate, last_move, bIamBlack, goodMoves, seed, max_time_to_move):
+        # lets a new (seeded) ai make a move. Returns whether it is one of goodMoves, and the time it took (ms).
+        random.seed(seed)
+        np.random.seed(seed)
+        aiPlayer = playerFactory()
+        if isinstance(getattr(aiPlayer, "rng", None), random.Random):
+            aiPlayer.rng.seed(seed)  # e.g. super_ai has its own rng
+        aiPlayer.new_game(bIamBlack)
+
+        start_time = time.perf_counter()
+        move = aiPlayer.move(gamestate, last_move, max_time_to_move)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        return (int(move[0]), int(move[1])) in goodMoves, elapsed_ms
+
+    def trials(nofRuns, seed=0):
+        # (name, bToggleColors, seed) of all trials
+        result = []
+        for name, case in QUICKTESTS.items():
+            for bToggleColors in (False, True) if case["bothColors"] else (False,):
+                for nRun in range(nofRuns):
+                    result.append((name, bToggleColors, seed + nRun))
+        return result
+
+    def runAll(playerFactory, nofRuns=10, max_time_to_move=1000, workers=None, seed=0):
+        """Returns {(name, "black"/"white"): {"passed": .., "runs": .., "ms": [time of every correct move]}}."""
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    GmQuickTestRunner.runTrial,
+                    playerFactory,
+                    name,
+                    bToggleColors,
+                    trialSeed,
+                    max_time_to_move,
+                )
+                for name, bToggleColors, trialSeed in GmQuickTestRunner.trials(nofRuns, seed)
+            ]
+            for future in futures:
+                name, bIamBlack, bPassed, elapsed_ms = future.result()
+                result = results.setdefault(
+                    (name, "black" if bIamBlack else "white"),
+                    {"passed": 0, "runs": 0, "ms": []},
+                )
+                result["runs"] += 1
+                if bPassed:
+                    result["passed"] += 1
+                    result["ms"].append(elapsed_ms)
+        return results
+
+    def wilsonInterval(nofPassed, nofRuns, z=1.96):
+        # the (95%) confidence interval of a pass rate. Unlike passed/runs +- error,
+        # it is also meaningful for few runs and for pass rates near 0 or 1.
+        if nofRuns == 0:
+            return 0.0, 1.0
+        p = nofPassed / nofRuns
+        denominator = 1 + z * z / nofRuns
+        centre = (p + z * z / (2 * nofRuns)) / denominator
+        margin = (
+            z * math.sqrt(p * (1 - p) / nofRuns + z * z / (4 * nofRuns * nofRuns)) / denominator
+        )
+        return max(0.0, centre - margin), min(1.0, centre + margin)
+
+    def printResults(results):
+        print(
+            "{:<24} {:<6} {:>6} {:>8} {:>16} {:>14}".format(
+                "test", "color", "runs", "passed", "95% interval", "ms (correct)"
+            )
+        )
+        nofPassed = nofRuns = 0
+        for (name, color), result in results.items():
+            low, high = GmQuickTestRunner.wilsonInterval(result["passed"], result["runs"])
+            ms = "{:.0f}".format(np.median(result["ms"])) if result["ms"] else "-"
+            print(
+                "{:<24} {:<6} {:>6} {:>7.0%} {:>7.0%} - {:>4.0%} {:>14}".format(
+                    QUICKTESTS[name]["title"],
+                    color,
+                    result["runs"],
+                    result["passed"] / result["runs"],
+                    low,
+                    high,
+                    ms,
+                )
+            )
+            nofPassed += result["passed"]
+            nofRuns += result["runs"]
+        low, high = GmQuickTestRunner.wilsonInterval(nofPassed, nofRuns)
+        print(
+            "{:<31} {:>6} {:>7.0%} {:>7.0%} - {:>4.0%}".format(
+                "all", nofRuns, nofPassed / nofRuns if nofRuns else 0.0, low, high
+            )
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="runs the GmQuickTests many times, in parallel")
+    parser.add_argument("--player", default="super_ai.super_ai:super_ai", help="the ai, as module:Class")
+    parser.add_argument("--runs", type=int, default=10, help="runs per test and color")
+    parser.add_argument("--time", type=int, default=1000, help="max_time_to_move (ms)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: the number of cpu's)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    module, _, className = args.player.partition(":")
+    playerClass = getattr(importlib.import_module(module), className)
+    GmQuickTestRunner.printResults(
+        GmQuickTestRunner.runAll(playerClass, args.runs, args.time, args.workers, args.seed)
+    )
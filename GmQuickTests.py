@@ -53,29 +53,142 @@ from GmUtils import GmUtils
 from gomoku import pretty_board
 
 
-class GmQuickTests:
-    def validateGameRules():
-        bValidGameRules = (
-            (GmGameRules().BOARDHEIGHT == 7)
-            and (GmGameRules().BOARDWIDTH == 7)
-            and (GmGameRules().winningSeries == 5)
-        )
-        if not bValidGameRules:
-            print(
-                "Invalid GameRules: board must be 7x7, winningseries must be 5 for this test."
-            )
-            print("Note: board SIZE can be adjusted in gomoku.h")
-        return bValidGameRules
+# The test cases, by name. The board size of a case is the size of its board.
+# bothColors: the case is also run with the colors toggled (the ai playing the other color).
+QUICKTESTS = {
+    "testWinSelf1": {
+        "title": "testWinSelf1",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 1, 1],
+        ],
+        "ply": 7,
+        "last_move_oppWhite": (6, 6),
+        "last_move_oppBlack": (3, 0),
+        "goodMoves": [(2, 0)],
+        "bothColors": True,
+    },
+    "testPreventWinOther1": {
+        "title": "testPreventWinOther1",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 2, 2],
+        ],
+        "ply": 7,
+        "last_move_oppWhite": (3, 0),
+        "last_move_oppBlack": (6, 6),
+        "goodMoves": [(2, 0)],
+        "bothColors": True,
+    },
+    "testWinSelf2": {
+        "title": "testWinSelf2",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 1, 1],
+        ],
+        "ply": 7,
+        "last_move_oppWhite": (6, 6),
+        "last_move_oppBlack": (2, 0),
+        "goodMoves": [(1, 0), (6, 0)],
+        "bothColors": True,
+    },
+    "testPreventWinOther2": {
+        "title": "testPreventWinOther2",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 2, 2],
+        ],
+        "ply": 5,
+        "last_move_oppWhite": (2, 0),
+        "last_move_oppBlack": (6, 6),
+        "goodMoves": [(1, 0), (6, 0)],
+        "bothColors": True,
+    },
+    "testWinSelf3": {
+        "title": "testWinSelf3",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [2, 0, 0, 0, 0, 0, 1],
+            [2, 0, 0, 0, 0, 0, 1],
+            [2, 0, 0, 0, 0, 0, 1],
+            [2, 0, 0, 0, 0, 0, 1],
+        ],
+        "ply": 9,
+        "last_move_oppWhite": (3, 6),
+        "last_move_oppBlack": (3, 0),
+        "goodMoves": [(2, 0)],
+        "bothColors": True,
+    },
+    "testPreventAdvanced1": {
+        "title": "testAdvanced1",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 2],
+        ],
+        "ply": 5,
+        "last_move_oppWhite": (2, 0),
+        "last_move_oppBlack": (6, 6),
+        "goodMoves": [(1, 0), (5, 0)],
+        "bothColors": True,
+    },
+    "testPreventAdvanced2": {
+        "title": "testAdvanced2",
+        "board": [
+            [0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 0],
+            [1, 0, 0, 2, 0, 0, 0],
+            [0, 0, 2, 1, 0, 0, 0],
+            [1, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 2, 0, 0],
+            [0, 0, 0, 0, 0, 1, 2],
+        ],
+        "ply": 5,
+        "last_move_oppWhite": (2, 0),
+        "last_move_oppBlack": (2, 3),
+        "goodMoves": [(3, 0), (2, 2), (2, 4), (5, 0)],
+        "bothColors": False,  # this test was composed for black only
+    },
+}
 
-    def testMove(
-        aiPlayer,
-        testTitle,
-        gamestate,
-        last_move_oppWhite,
-        last_move_oppBlack,
-        lstGoodMoves,
-        bToggleColors,
-    ):
+
+class GmQuickTests:
+    def useBoardSize(bsize):
+        # the board size of a test is the size of its board: no need to change SIZE in gomoku.py.
+        # (for ai's that use GmGameRules)
+        GmGameRules.BOARDWIDTH = bsize
+        GmGameRules.BOARDHEIGHT = bsize
+        GmGameRules.winningSeries = 5
+
+    def prepareTest(gamestate, last_move_oppWhite, last_move_oppBlack, bToggleColors):
+        # returns the gamestate (with the colors toggled if bToggleColors), the last move of the opponent,
+        # and whether the ai plays black.
         bIamBlack = (gamestate[1] % 2) == 1
         if bToggleColors:
             bIamBlack = not bIamBlack
@@ -91,6 +204,36 @@ class GmQuickTests:
             last_move = last_move_oppWhite
         else:
             last_move = last_move_oppBlack
+        return gamestate, last_move, bIamBlack
+
+    def caseGamestate(case):
+        # a fresh copy: the tests change the board.
+        return (np.array(case["board"]), case["ply"])
+
+    def testCase(aiPlayer, name, bToggleColors=False):
+        case = QUICKTESTS[name]
+        GmQuickTests.testMove(
+            aiPlayer,
+            case["title"],
+            GmQuickTests.caseGamestate(case),
+            case["last_move_oppWhite"],
+            case["last_move_oppBlack"],
+            case["goodMoves"],
+            bToggleColors,
+        )
+
+    def testMove(
+        aiPlayer,
+        testTitle,
+        gamestate,
+        last_move_oppWhite,
+        last_move_oppBlack,
+        lstGoodMoves,
+        bToggleColors,
+    ):
+        gamestate, last_move, bIamBlack = GmQuickTests.prepareTest(
+            gamestate, last_move_oppWhite, last_move_oppBlack, bToggleColors
+        )
 
         if bIamBlack:
             testTitle += "_as black player"
@@ -98,8 +241,7 @@ class GmQuickTests:
             testTitle += "_as white player"
 
         print(testTitle)
-        if not GmQuickTests.validateGameRules():
-            return
+        GmQuickTests.useBoardSize(len(gamestate[0]))
 
         aiPlayer.new_game(bIamBlack)
 
@@ -124,174 +266,25 @@ class GmQuickTests:
         print("-----------------")
 
     def testWinSelf1(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 1, 1],
-                ]
-            ),
-            7,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer, "testWinSelf1", gamestate, (6, 6), (3, 0), [(2, 0)], bToggleColors
-        )
+        GmQuickTests.testCase(aiPlayer, "testWinSelf1", bToggleColors)
 
     def testPreventWinOther1(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 2, 2],
-                ]
-            ),
-            7,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer,
-            "testPreventWinOther1",
-            gamestate,
-            (3, 0),
-            (6, 6),
-            [(2, 0)],
-            bToggleColors,
-        )
+        GmQuickTests.testCase(aiPlayer, "testPreventWinOther1", bToggleColors)
 
     def testWinSelf2(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 1, 1],
-                ]
-            ),
-            7,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer,
-            "testWinSelf2",
-            gamestate,
-            (6, 6),
-            (2, 0),
-            [(1, 0), (6, 0)],
-            bToggleColors,
-        )
+        GmQuickTests.testCase(aiPlayer, "testWinSelf2", bToggleColors)
 
     def testPreventWinOther2(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 2, 2],
-                ]
-            ),
-            5,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer,
-            "testPreventWinOther2",
-            gamestate,
-            (2, 0),
-            (6, 6),
-            [(1, 0), (6, 0)],
-            bToggleColors,
-        )
+        GmQuickTests.testCase(aiPlayer, "testPreventWinOther2", bToggleColors)
 
     def testWinSelf3(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [2, 0, 0, 0, 0, 0, 1],
-                    [2, 0, 0, 0, 0, 0, 1],
-                    [2, 0, 0, 0, 0, 0, 1],
-                    [2, 0, 0, 0, 0, 0, 1],
-                ]
-            ),
-            9,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer, "testWinSelf3", gamestate, (3, 6), (3, 0), [(2, 0)], bToggleColors
-        )
+        GmQuickTests.testCase(aiPlayer, "testWinSelf3", bToggleColors)
 
     def testPreventAdvanced1(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 2],
-                ]
-            ),
-            5,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer,
-            "testAdvanced1",
-            gamestate,
-            (2, 0),
-            (6, 6),
-            [(1, 0), (5, 0)],
-            bToggleColors,
-        )
+        GmQuickTests.testCase(aiPlayer, "testPreventAdvanced1", bToggleColors)
 
     def testPreventAdvanced2(aiPlayer, bToggleColors=False):
-        gamestate = (
-            np.array(
-                [
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 0, 0, 0],
-                    [1, 0, 0, 2, 0, 0, 0],
-                    [0, 0, 2, 1, 0, 0, 0],
-                    [1, 0, 0, 0, 0, 0, 0],
-                    [0, 0, 0, 0, 2, 0, 0],
-                    [0, 0, 0, 0, 0, 1, 2],
-                ]
-            ),
-            5,
-        )
-
-        GmQuickTests.testMove(
-            aiPlayer,
-            "testAdvanced2",
-            gamestate,
-            (2, 0),
-            (2, 3),
-            [(3, 0), (2, 2), (2, 4), (5, 0)],
-            bToggleColors,
-        )
+        GmQuickTests.testCase(aiPlayer, "testPreventAdvanced2", bToggleColors)
 
     def doAllTests(aiPlayer):
         print("*****************************************")
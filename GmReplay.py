@@ -0,0 +1,225 @@
+# Replays recorded games (see game_log.py) in the GmGame window.
+# The log is memory mapped and read one game at a time, so huge logs can be replayed as well.
+#
+# usage: python GmReplay.py competition_games.log [--agent "my ai"] [--losses] [--speed 2]
+#
+# keys:
+#   space           play / pause
+#   right / left    one move forward / back
+#   home / end      to the start / end of the game
+#   up / down       play faster / slower
+#   page down / n   next game
+#   page up / p     previous game
+#   <number> enter  jump to game <number> (the first game is 1)
+#   <number> m      jump to move <number> of the current game
+#   escape          quit
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pygame
+from pygame.locals import (
+    KEYDOWN,
+    K_DOWN,
+    K_END,
+    K_ESCAPE,
+    K_HOME,
+    K_LEFT,
+    K_PAGEDOWN,
+    K_PAGEUP,
+    K_RETURN,
+    K_RIGHT,
+    K_SPACE,
+    K_UP,
+    K_m,
+    K_n,
+    K_p,
+    QUIT,
+    WINDOWEXPOSED,
+)
+
+from GmGame import GmGame
+from GmGameRules import GmGameRules
+from game_log import map_game_log, game_offsets
+
+
+class GmReplay:
+    def __init__(self, path, agent=None, lossesOnly=False, movesPerSecond=2.0):
+        """Replays the games in the log at path.
+        If agent is given, only the games of that agent are shown, and if lossesOnly is set, only the ones it lost."""
+        self.mm = map_game_log(path)
+        self.lines = game_offsets(self.mm) if self.mm is not None else iter(())
+        self.offsets = []  # (start,end) of the matching games that have been found so far
+        self.agent = agent
+        self.lossesOnly = lossesOnly
+        self.movesPerSecond = movesPerSecond
+        self.playing = True
+        self.record = None
+        self.gameIndex = -1
+        self.nofMovesShown = 0
+        self.typedNumber = ""
+
+    def matches(self, record):
+        if self.agent is None:
+            return not self.lossesOnly or record["winner"] is not None
+        if self.agent == record["black"]:
+            color = "black"
+        elif self.agent == record["white"]:
+            color = "white"
+        else:
+            return False
+        return not self.lossesOnly or record["winner"] not in (None, color)
+
+    def findGame(self, index):
+        """Scans the log (lazily) until game index has been found. Returns whether it exists."""
+        while len(self.offsets) <= index:
+            try:
+                start, end = next(self.lines)
+            except StopIteration:
+                return False
+            try:
+                record = json.loads(self.mm[start:end])
+            except ValueError:
+                continue  # truncated by a crash
+            if self.matches(record):
+                self.offsets.append((start, end))
+        return index >= 0
+
+    def loadGame(self, index):
+        if not self.findGame(index):
+            return False
+        start, end = self.offsets[index]
+        self.record = json.loads(self.mm[start:end])
+        self.gameIndex = index
+        self.nofMovesShown = 0
+        if self.record["bsize"] != GmGameRules.BOARDWIDTH:
+            GmGame.setBoardSize(self.record["bsize"], self.record["bsize"])
+        return True
+
+    def seek(self, nofMoves):
+        self.nofMovesShown = max(0, min(nofMoves, len(self.record["moves"])))
+
+    def boardAfter(self, nofMoves):
+        board = np.zeros(
+            (GmGameRules.BOARDHEIGHT, GmGameRules.BOARDWIDTH), dtype=np.int8
+        )
+        moves = self.record["moves"]
+        # black (odd ply) made the even moves in the list.
+        for k in range(nofMoves):
+            board[moves[k][0]][moves[k][1]] = GmGame.BLACK if k % 2 == 0 else GmGame.WHITE
+        return board
+
+    def draw(self):
+        board = self.boardAfter(self.nofMovesShown)
+        moves = self.record["moves"]
+        if self.nofMovesShown > 0:
+            last_move = moves[self.nofMovesShown - 1]
+            GmGame.drawBoardWithExtraTokens(
+                board, last_move[0], last_move[1], GmGame.MARKER
+            )
+        else:
+            GmGame.drawBoardWithExtraTokens(board)
+        if self.nofMovesShown == len(moves):
+            if self.record["winner"] == "black":
+                GmGame.drawWinner(GmGame.BLACK)
+            elif self.record["winner"] == "white":
+                GmGame.drawWinner(GmGame.WHITE)
+            else:
+                GmGame.drawWinner(None)
+        GmGame.updateDisplay()
+        pygame.display.set_caption(
+            "Gomoku replay - game {}: {} (black) vs {} (white) - move {}/{} - {} - {} moves/s{}".format(
+                self.gameIndex + 1,
+                self.record["black"],
+                self.record["white"],
+                self.nofMovesShown,
+                len(moves),
+                self.record["reason"],
+                self.movesPerSecond,
+                "" if self.playing else " (paused)",
+            )
+        )
+
+    def handleKey(self, key, unicode):
+        if unicode.isdigit():
+            self.typedNumber += unicode
+            return
+        number = int(self.typedNumber) if self.typedNumber else None
+        self.typedNumber = ""
+
+        if key == K_ESCAPE:
+            pygame.quit()
+            sys.exit()
+        elif key == K_SPACE:
+            self.playing = not self.playing
+        elif key == K_RIGHT:
+            self.seek(self.nofMovesShown + 1)
+        elif key == K_LEFT:
+            self.seek(self.nofMovesShown - 1)
+        elif key == K_HOME:
+            self.seek(0)
+        elif key == K_END:
+            self.seek(len(self.record["moves"]))
+        elif key == K_UP:
+            self.movesPerSecond *= 2
+        elif key == K_DOWN:
+            self.movesPerSecond /= 2
+        elif key in (K_PAGEDOWN, K_n):
+            self.loadGame(self.gameIndex + 1)
+        elif key in (K_PAGEUP, K_p):
+            self.loadGame(self.gameIndex - 1)
+        elif key == K_RETURN and number is not None:
+            self.loadGame(number - 1)
+        elif key == K_m and number is not None:
+            self.seek(number)
+
+    def run(self):
+        GmGame.initDisplay()
+        if not self.loadGame(0):
+            print("no (matching) games in the log")
+            return
+        lastStepTime = time.time()
+        drawnState = None
+        while True:
+            for event in pygame.event.get():  # event handling loop
+                if event.type == QUIT:
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == KEYDOWN:
+                    self.handleKey(event.key, event.unicode)
+                    lastStepTime = time.time()
+                elif event.type == WINDOWEXPOSED:
+                    pygame.display.update()
+
+            if self.playing and time.time() - lastStepTime >= 1 / self.movesPerSecond:
+                lastStepTime = time.time()
+                if self.nofMovesShown < len(self.record["moves"]):
+                    self.seek(self.nofMovesShown + 1)
+                elif not self.loadGame(self.gameIndex + 1):
+                    self.playing = False  # that was the last game
+
+            state = (
+                self.gameIndex,
+                self.nofMovesShown,
+                self.movesPerSecond,
+                self.playing,
+            )
+            if state != drawnState:  # only draw when something changed
+                self.draw()
+                drawnState = state
+            GmGame.FPSCLOCK.tick(GmGame.FPS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays recorded gomoku games.")
+    parser.add_argument("log", help="game log, as written by competition.open_game_log")
+    parser.add_argument("--agent", help="only show the games of this agent (its id)")
+    parser.add_argument(
+        "--losses", action="store_true", help="only show the games the agent lost"
+    )
+    parser.add_argument("--speed", type=float, default=2.0, help="moves per second")
+    args = parser.parse_args()
+    GmReplay(args.log, args.agent, args.losses, args.speed).run()
@@ -0,0 +1,236 @@
+import gzip
+import importlib
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GmQuickTestRunner import GmQuickTestRunner
+from GmQuickTests import QUICKTESTS, GmQuickTests
+
+
+# Test positions in a compact text format (gpd: gomoku position description, after the epd of chess),
+# to build tactical regression suites of thousands of positions, and a runner that measures the
+# solve rate of an ai against the time it gets per move.
+#
+# One position per line:
+#   <board> <ply> bm <good moves>; lm <last move>; id <name>; tag <tag>
+# board: the rows, separated by "/". x is a stone of value 1 (white), o of value 2 (black)
+#        (as in gomoku.pretty_board), a number is that many empty cells. The board size is the number of rows.
+# ply:   the ply of the move to make: odd means black (o) is to move.
+# bm:    the acceptable moves, as row,col separated by spaces. Required.
+# lm:    the last move of the opponent (row,col), optional. id and tag are optional too.
+# Empty lines and lines starting with # are skipped. Files ending in .gz are read compressed.
+#
+# e.g.  7/7/7/o6/o6/o6/o4xx 7 bm 2,0; lm 6,6; id testWinSelf1; tag win
+#
+# usage: python GmTestPositions.py tactics/quicktests.gpd --player super_ai.super_ai:super_ai --times 100 300 1000
+#        python GmTestPositions.py --export-quicktests tactics/quicktests.gpd
+class GmTestPositions:
+    STONES = {"x": 1, "o": 2}
+    CHARS = {1: "x", 2: "o"}
+
+    def parseBoard(text):
+        rows = []
+        for rowText in text.split("/"):
+            row = []
+            number = ""
+            for char in rowText + " ":
+                if char.isdigit():
+                    number += char
+                    continue
+                if number:
+                    row.extend([0] * int(number))
+                    number = ""
+                if char in GmTestPositions.STONES:
+                    row.append(GmTestPositions.STONES[char])
+                elif char != " ":
+                    raise ValueError("invalid character in board: " + char)
+            rows.append(row)
+        if any(len(row) != len(rows) for row in rows):
+            raise ValueError("board is not square")
+        return np.array(rows, dtype=np.int8)
+
+    def formatBoard(board):
+        rowTexts = []
+        for row in board:
+            text = ""
+            nofEmpty = 0
+            for value in row:
+                if value == 0:
+                    nofEmpty += 1
+                    continue
+                if nofEmpty:
+                    text += str(nofEmpty)
+                    nofEmpty = 0
+                text += GmTestPositions.CHARS[int(value)]
+            if nofEmpty:
+                text += str(nofEmpty)
+            rowTexts.append(text)
+        return "/".join(rowTexts)
+
+    def parseMove(text):
+        row, col = text.split(",")
+        return (int(row), int(col))
+
+    def parseLine(line):
+        """A position: {"board", "ply", "goodMoves", "last_move", "id", "tag"}, or None for a comment/empty line."""
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return None
+        boardText, plyText, operations = line.split(None, 2)
+        position = {
+            "board": GmTestPositions.parseBoard(boardText),
+            "ply": int(plyText),
+            "goodMoves": None,
+            "last_move": (),
+            "id": "",
+            "tag": "",
+        }
+        for operation in operations.split(";"):
+            opcode, _, argument = operation.strip().partition(" ")
+            argument = argument.strip()
+            if opcode == "bm":
+                position["goodMoves"] = [GmTestPositions.parseMove(move) for move in argument.split()]
+            elif opcode == "lm":
+                position["last_move"] = GmTestPositions.parseMove(argument) if argument != "-" else ()
+            elif opcode == "id":
+                position["id"] = argument
+            elif opcode == "tag":
+                position["tag"] = argument
+            elif opcode:
+                raise ValueError("unknown opcode: " + opcode)
+        if not position["goodMoves"]:
+            raise ValueError("no good moves (bm)")
+        for move in position["goodMoves"]:
+            if position["board"][move] != 0:
+                raise ValueError("good move {} is not empty".format(move))
+        return position
+
+    def formatPosition(position):
+        operations = ["bm " + " ".join("{},{}".format(*move) for move in position["goodMoves"])]
+        if position.get("last_move"):
+            operations.append("lm {},{}".format(*position["last_move"]))
+        if position.get("id"):
+            operations.append("id " + position["id"])
+        if position.get("tag"):
+            operations.append("tag " + position["tag"])
+        return "{} {} {}".format(
+            GmTestPositions.formatBoard(position["board"]), position["ply"], "; ".join(operations)
+        )
+
+    def load(path):
+        """Lazily yields the positions in the file at path (one at a time, so the corpus can be huge)."""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            for nLine, line in enumerate(f, 1):
+                try:
+                    position = GmTestPositions.parseLine(line)
+                except ValueError as error:
+                    raise ValueError("{}:{}: {}".format(path, nLine, error))
+                if position is not None:
+                    yield position
+
+    def fromQuickTests():
+        """The GmQuickTests cases as positions, in both colors where the case allows it."""
+        for name, case in QUICKTESTS.items():
+            for bToggleColors in (False, True) if case["bothColors"] else (False,):
+                gamestate, last_move, bIamBlack = GmQuickTests.prepareTest(
+                    GmQuickTests.caseGamestate(case),
+                    case["last_move_oppWhite"],
+                    case["last_move_oppBlack"],
+                    bToggleColors,
+                )
+                yield {
+                    "board": gamestate[0],
+                    "ply": gamestate[1],
+                    "goodMoves": case["goodMoves"],
+                    "last_move": last_move,
+                    "id": "{}_{}".format(case["title"], "black" if bIamBlack else "white"),
+                    "tag": name,
+                }
+
+    # runs in a worker process
+    def runPosition(playerFactory, position, seed, max_time_to_move):
+        GmQuickTests.useBoardSize(len(position["board"]))
+        bPassed, elapsed_ms = GmQuickTestRunner.tryMove(
+            playerFactory,
+            (position["board"].copy(), position["ply"]),
+            position["last_move"],
+            position["ply"] % 2 == 1,
+            position["goodMoves"],
+            seed,
+            max_time_to_move,
+        )
+        return position["tag"], max_time_to_move, bPassed, elapsed_ms
+
+    def runCorpus(playerFactory, positions, times=(100, 300, 1000), workers=None, seed=0, maxPending=256):
+        """Runs every position at every time budget (ms). positions: e.g. GmTestPositions.load(path).
+        Returns {time: {tag: [nofSolved, nofPositions]}}, with tag "" for all positions together."""
+        results = {t: {"": [0, 0]} for t in times}
+
+        def count(future):
+            tag, t, bPassed, elapsed_ms = future.result()
+            for key in {"", tag}:
+                counts = results[t].setdefault(key, [0, 0])
+                counts[0] += bPassed
+                counts[1] += 1
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for nPosition, position in enumerate(positions):
+                for t in times:
+                    pending.append(
+                        pool.submit(GmTestPositions.runPosition, playerFactory, position, seed + nPosition, t)
+                    )
+                # don't read the whole corpus ahead of the workers
+                while len(pending) > maxPending:
+                    count(pending.popleft())
+            while pending:
+                count(pending.popleft())
+        return results
+
+    def printResults(results):
+        tags = sorted({tag for counts in results.values() for tag in counts})
+        print("{:<28}".format("solve rate (time ms)") + "".join("{:>18}".format(t) for t in results))
+        for tag in tags:
+            line = "{:<28}".format(tag or "all")
+            for t, counts in results.items():
+                nofSolved, nofPositions = counts.get(tag, [0, 0])
+                if nofPositions:
+                    low, high = GmQuickTestRunner.wilsonInterval(nofSolved, nofPositions)
+                    line += "{:>6.0%} ({:>3.0%}-{:>4.0%})".format(nofSolved / nofPositions, low, high)
+                else:
+                    line += "{:>18}".format("-")
+            print(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="solve rate of an ai on a corpus of test positions")
+    parser.add_argument("corpus", nargs="?", help="positions file (.gpd, or .gpd.gz)")
+    parser.add_argument("--player", default="super_ai.super_ai:super_ai", help="the ai, as module:Class")
+    parser.add_argument("--times", type=int, nargs="+", default=[100, 300, 1000], help="time budgets (ms)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    parser.add_argument("--export-quicktests", metavar="PATH", help="write the GmQuickTests cases as a corpus")
+    args = parser.parse_args()
+
+    if args.export_quicktests:
+        with open(args.export_quicktests, "w") as f:
+            f.write("# the GmQuickTests cases, in both colors\n")
+            for position in GmTestPositions.fromQuickTests():
+                f.write(GmTestPositions.formatPosition(position) + "\n")
+    if args.corpus:
+        module, _, className = args.player.partition(":")
+        playerClass = getattr(importlib.import_module(module), className)
+        results = GmTestPositions.runCorpus(
+            playerClass, GmTestPositions.load(args.corpus), args.times, args.workers, args.seed
+        )
+        if args.json:
+            print(json.dumps({str(t): counts for t, counts in results.items()}))
+        else:
+            GmTestPositions.printResults(results)
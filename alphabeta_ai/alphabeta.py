@@ -0,0 +1,347 @@
+# A negamax alpha-beta search for gomoku: iterative deepening under a time limit, a transposition table,
+# and killer/history move ordering, on a compact board that is updated with make/unmake.
+#
+# The board keeps, for every window of 5 cells in a row (in any of the 4 directions), the number of black and
+# white stones in it. A window with stones of one colour only is a potential five: the static evaluation is
+# the sum of WINDOW_VALUES over those windows (black positive, white negative), and is updated incrementally:
+# a stone changes the counts of at most 20 windows. The windows with 4 stones of one colour are the threats:
+# the cell that completes one wins (if it makes exactly five: 6 or more in a row doesn't win).
+#
+# Deterministic: with a depth limit (and no time limit), the same position always gives the same move.
+
+from super_ai.search_limit import search_limit
+from super_ai.symmetry import zobrist_table
+
+BLACK, WHITE = 2, 1  # the stone values of gomoku.py; black moves at odd plies
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+WIN = 1000000
+MATE = WIN - 1000  # values beyond this are wins or losses in (WIN - value) plies from the root
+
+# per number of stones of one colour in a window (0..5). A window of 5 is always an overline: a real five
+# ends the search before it is made (see alphabeta_search.negamax).
+WINDOW_VALUES = (0, 1, 8, 64, 512, 0)
+# the move ordering score of a stone in a window with n own stones (attack), or n of the opponent (defence)
+ATTACK = (1, 7, 56, 448, 4096)
+DEFENCE = (1, 6, 48, 384, 4096)
+NEIGHBOURHOOD = 2  # candidate moves are the empty cells within this distance of a stone
+
+
+def _other(colour):
+    return BLACK if colour == WHITE else WHITE
+
+
+class _board_tables:
+    """What only depends on the board size (about 5 ms to build on 19x19): built once per size, see tables."""
+
+    def __init__(self, size: int):
+        self.windows = []  # the 5 cells of each window
+        self.window_directions = []
+        self.cell_windows = [[] for _ in range(size * size)]
+        for row in range(size):
+            for col in range(size):
+                for d, (dr, dc) in enumerate(DIRECTIONS):
+                    end_row, end_col = row + 4 * dr, col + 4 * dc
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        cells = [(row + k * dr) * size + col + k * dc for k in range(5)]
+                        for cell in cells:
+                            self.cell_windows[cell].append(len(self.windows))
+                        self.windows.append(cells)
+                        self.window_directions.append(d)
+        self.neighbours = [
+            [
+                r * size + c
+                for r in range(max(0, cell // size - NEIGHBOURHOOD), min(size, cell // size + NEIGHBOURHOOD + 1))
+                for c in range(max(0, cell % size - NEIGHBOURHOOD), min(size, cell % size + NEIGHBOURHOOD + 1))
+                if r * size + c != cell
+            ]
+            for cell in range(size * size)
+        ]
+        self.zobrist = [[int(key) for key in keys] for keys in zobrist_table(size)]
+
+
+_tables = {}
+
+
+def tables(size: int) -> _board_tables:
+    if size not in _tables:
+        _tables[size] = _board_tables(size)
+    return _tables[size]
+
+
+class compact_board:
+    def __init__(self, size: int):
+        self.size = size
+        self.stones = [0] * (size * size)
+        self.ply = 1
+        # shared by all boards of this size, never changed
+        size_tables = tables(size)
+        self.windows = size_tables.windows
+        self.window_directions = size_tables.window_directions
+        self.cell_windows = size_tables.cell_windows
+        self.neighbours = size_tables.neighbours
+        self.zobrist = size_tables.zobrist
+        self.counts = {BLACK: [0] * len(self.windows), WHITE: [0] * len(self.windows)}
+        self.fours = {BLACK: set(), WHITE: set()}  # the windows with 4 stones of a colour (and none of the other)
+        self.score = 0  # the static evaluation, for black
+        self.near = [0] * (size * size)  # per cell, the number of stones in its neighbourhood
+        self.key = 0
+
+    @classmethod
+    def from_state(cls, state) -> "compact_board":
+        board, ply = state
+        result = cls(len(board))
+        for row in range(result.size):
+            for col in range(result.size):
+                if board[row][col] != 0:
+                    result.place(row * result.size + col, int(board[row][col]))
+        result.ply = int(ply)
+        return result
+
+    def to_move(self) -> int:
+        return BLACK if self.ply % 2 == 1 else WHITE
+
+    def place(self, cell: int, colour: int):
+        """Puts a stone on cell (without changing the ply)."""
+        self.stones[cell] = colour
+        self.key ^= self.zobrist[cell][colour]
+        own, other = self.counts[colour], self.counts[_other(colour)]
+        sign = 1 if colour == BLACK else -1
+        for w in self.cell_windows[cell]:
+            n = own[w]
+            if other[w] == 0:
+                self.score += sign * (WINDOW_VALUES[n + 1] - WINDOW_VALUES[n])
+                if n == 3:
+                    self.fours[colour].add(w)
+                elif n == 4:
+                    self.fours[colour].discard(w)
+            elif n == 0:
+                # the window can't be a five of the other colour anymore
+                m = other[w]
+                self.score += sign * WINDOW_VALUES[m]
+                if m == 4:
+                    self.fours[_other(colour)].discard(w)
+            own[w] = n + 1
+        for neighbour in self.neighbours[cell]:
+            self.near[neighbour] += 1
+
+    def remove(self, cell: int):
+        """Takes the stone off cell: the exact inverse of place."""
+        colour = self.stones[cell]
+        self.stones[cell] = 0
+        self.key ^= self.zobrist[cell][colour]
+        own, other = self.counts[colour], self.counts[_other(colour)]
+        sign = 1 if colour == BLACK else -1
+        for w in self.cell_windows[cell]:
+            n = own[w] - 1
+            own[w] = n
+            if other[w] == 0:
+                self.score -= sign * (WINDOW_VALUES[n + 1] - WINDOW_VALUES[n])
+                if n == 3:
+                    self.fours[colour].discard(w)
+                elif n == 4:
+                    self.fours[colour].add(w)
+            elif n == 0:
+                m = other[w]
+                self.score -= sign * WINDOW_VALUES[m]
+                if m == 4:
+                    self.fours[_other(colour)].add(w)
+        for neighbour in self.neighbours[cell]:
+            self.near[neighbour] -= 1
+
+    def make(self, cell: int):
+        self.place(cell, self.to_move())
+        self.ply += 1
+
+    def unmake(self, cell: int):
+        self.ply -= 1
+        self.remove(cell)
+
+    def makes_five(self, cell: int, colour: int, direction: int) -> bool:
+        """Whether a stone of colour on (empty) cell makes exactly five in a row in direction."""
+        dr, dc = DIRECTIONS[direction]
+        length = 1
+        for sign in (1, -1):
+            row, col = cell // self.size + sign * dr, cell % self.size + sign * dc
+            while 0 <= row < self.size and 0 <= col < self.size and self.stones[row * self.size + col] == colour:
+                length += 1
+                row, col = row + sign * dr, col + sign * dc
+        return length == 5
+
+    def winning_cells(self, colour: int):
+        """The cells where colour would make five."""
+        cells = set()
+        for w in self.fours[colour]:
+            for cell in self.windows[w]:
+                if self.stones[cell] == 0:
+                    if self.makes_five(cell, colour, self.window_directions[w]):
+                        cells.add(cell)
+                    break
+        return cells
+
+    def evaluate(self) -> int:
+        """The static evaluation for the player to move."""
+        return self.score if self.to_move() == BLACK else -self.score
+
+    def candidates(self, colour: int):
+        """(ordering score, cell) of the empty cells near the stones, for colour to move."""
+        own, other = self.counts[colour], self.counts[_other(colour)]
+        result = []
+        for cell in range(len(self.stones)):
+            if self.near[cell] == 0 or self.stones[cell] != 0:
+                continue
+            score = 0
+            for w in self.cell_windows[cell]:
+                if other[w] == 0:
+                    score += ATTACK[own[w]]
+                elif own[w] == 0:
+                    score += DEFENCE[other[w]]
+            result.append((score, cell))
+        return result
+
+
+class _out_of_time(Exception):
+    pass
+
+
+def _to_table(value: int, ply: int) -> int:
+    """A value of the search as it is stored in the transposition table: a win or loss is counted from the
+    node (the same position can be reached at another ply, or in a later search), other values are unchanged."""
+    if value >= MATE:
+        return value + ply
+    if value <= -MATE:
+        return value - ply
+    return value
+
+
+def _from_table(value: int, ply: int) -> int:
+    """The inverse of _to_table: a stored value as a value of the search at ply."""
+    if value >= MATE:
+        return value - ply
+    if value <= -MATE:
+        return value + ply
+    return value
+
+
+class alphabeta_search:
+    EXACT, LOWER, UPPER = 0, 1, 2  # the kinds of values in the transposition table
+
+    def __init__(self, beam: int = 12, max_table_size: int = 1 << 16):
+        """beam: the number of moves (the best ones by the move ordering) that are searched in a node.
+        The transposition table is kept between searches (the keys don't depend on the game),
+        and cleared when it gets larger than max_table_size (an entry is about 200 bytes)."""
+        self.beam = beam
+        self.max_table_size = max_table_size
+        self.table = {}  # key -> (depth, value, flag, best cell)
+        self.history = {}  # cell -> score of the cutoffs it caused
+        self.killers = []  # per ply from the root: the last 2 moves that caused a cutoff
+        self.nodes = 0
+        self.depth = 0  # the depth of the last completed iteration
+        self.limit = None
+
+    def best_move(self, board: compact_board, limit: search_limit, start: bool = True):
+        """Iterative deepening until limit: time_ms, nodes, or iterations (the maximum depth).
+        start: False if the caller has already started limit (e.g. before it built the board).
+        Returns (cell, value) of the deepest completed iteration."""
+        self.limit = limit
+        if start:
+            limit.start()
+        self.nodes = 0
+        self.depth = 0
+        self.history = {}
+        if len(self.table) > self.max_table_size:
+            self.table = {}
+        wins = board.winning_cells(board.to_move())
+        if wins:
+            return min(wins), WIN
+        best, value = None, 0
+        depth = 1
+        while True:
+            self.killers = [[None, None] for _ in range(depth + 1)]
+            try:
+                value = self.negamax(board, depth, -WIN - 1, WIN + 1, 0)
+            except _out_of_time:
+                break
+            best = self.table[board.key][3]
+            self.depth = depth
+            if abs(value) >= WIN - 100 or limit.reached(depth, self.nodes):
+                break  # a forced win or loss: deeper doesn't change it
+            if limit.time_ms is not None and limit.elapsed_ms() > limit.time_ms / 3:
+                break  # the next iteration won't finish in time
+            depth += 1
+        if best is None:
+            # not even depth 1 finished: the best move by the ordering alone
+            best = self.ordered_moves(board, board.to_move(), 0, None)[0]
+        return best, value
+
+    def ordered_moves(self, board: compact_board, colour: int, ply: int, table_move):
+        blocks = board.winning_cells(_other(colour))
+        if blocks:
+            return sorted(blocks)  # the other would win: block (if there are more, the game is lost anyway)
+        candidates = board.candidates(colour)
+        if not candidates:
+            centre = (board.size // 2) * board.size + board.size // 2
+            return [centre] if board.stones[centre] == 0 else [board.stones.index(0)]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        keyed = []
+        for score, cell in candidates:
+            if cell == table_move:
+                score += 1 << 30
+            elif cell in killers:
+                score += ATTACK[3]
+            keyed.append((score + self.history.get(cell, 0), cell))
+        keyed.sort(reverse=True)
+        return [cell for score, cell in keyed[: self.beam]]
+
+    def negamax(self, board: compact_board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % 16 == 0 and self.limit.reached(0, self.nodes):
+            raise _out_of_time()
+        colour = board.to_move()
+        if ply > 0:
+            if board.winning_cells(colour):
+                return WIN - ply  # five next move. The sooner the better.
+            if len(board.winning_cells(_other(colour))) >= 2:
+                return -(WIN - ply - 1)  # two fives to block
+        if board.ply > len(board.stones):
+            return 0  # a full board: a draw
+        if depth == 0:
+            return board.evaluate()
+
+        entry = self.table.get(board.key)
+        table_move = None
+        if entry is not None:
+            table_move = entry[3]
+            if entry[0] >= depth and ply > 0:
+                value = _from_table(entry[1], ply)
+                if entry[2] == self.EXACT:
+                    return value
+                if entry[2] == self.LOWER and value >= beta:
+                    return value
+                if entry[2] == self.UPPER and value <= alpha:
+                    return value
+
+        original_alpha = alpha
+        best_value, best_cell = -WIN - 1, None
+        for cell in self.ordered_moves(board, colour, ply, table_move):
+            board.make(cell)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake(cell)
+            if value > best_value:
+                best_value, best_cell = value, cell
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                killers = self.killers[ply]
+                if cell != killers[0]:
+                    killers[1], killers[0] = killers[0], cell
+                self.history[cell] = self.history.get(cell, 0) + depth * depth
+                break
+
+        if best_value <= original_alpha:
+            flag = self.UPPER
+        elif best_value >= beta:
+            flag = self.LOWER
+        else:
+            flag = self.EXACT
+        self.table[board.key] = (depth, _to_table(best_value, ply), flag, best_cell)
+        return best_value
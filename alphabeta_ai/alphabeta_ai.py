@@ -0,0 +1,62 @@
+import gomoku
+from gomoku import GameState, Move
+from alphabeta_ai.alphabeta import alphabeta_search, compact_board
+from super_ai.search_limit import search_limit
+
+
+class alphabeta_ai:
+    """A player with an alpha-beta search (see alphabeta.py), instead of the rollouts of super_ai.
+    Deterministic, and much stronger in the tactics (fours and their blocks) on the large boards."""
+
+    def __init__(
+        self,
+        black_: bool = True,
+        limit: search_limit = None,
+        beam: int = 12,
+        safety_margin: float = 0.8,
+    ):
+        """Constructor for the player.
+        limit: a fixed search_limit for every move (e.g. search_limit(iterations=4): depth 4), instead of
+        max_time_to_move. Without a time, every search does exactly the same, on any machine.
+        beam: the number of moves searched per node.
+        safety_margin: the part of max_time_to_move the search may use."""
+        self.black = black_
+        self.limit = limit
+        self.safety_margin = safety_margin
+        self.search = alphabeta_search(beam)
+        self.playouts = 0  # the nodes of the last search, for the metrics of the move servers
+        self.depth = 0  # the depth of the last search
+
+    def new_game(self, black_: bool):
+        """At the start of each new game you will be notified by the competition.
+        this method has a boolean parameter that informs your agent whether you
+        will play black or white.
+        """
+        self.black = black_
+
+    def move(
+        self, state: GameState, last_move: Move, max_time_to_move: int = 1000
+    ) -> Move:
+        """This is the most important method: the agent will get:
+        1) the current state of the game
+        2) the last move by the opponent
+        3) the available moves you can play (this is a special service we provide ;-) )
+        4) the maximum time until the agent is required to make a move in milliseconds [diverging from this will lead to disqualification].
+        """
+        self.playouts = 0
+        if state[1] == 1:
+            return gomoku.valid_moves(state)[0]  # the only valid move: no need to search
+
+        limit = self.limit
+        if limit is None:
+            limit = search_limit(time_ms=max_time_to_move * self.safety_margin)
+        limit.start()  # building the board is part of the time of the move
+        board = compact_board.from_state(state)
+        cell, value = self.search.best_move(board, limit, start=False)
+        self.playouts = self.search.nodes
+        self.depth = self.search.depth
+        return cell // board.size, cell % board.size
+
+    def id(self) -> str:
+        """Please return a string here that uniquely identifies your submission e.g., "name (student_id)" """
+        return "alphabeta_ai"
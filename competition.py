@@ -1,12 +1,11 @@
 # NB: python version 3.7 or higher is required (else time_ns()) doesn't work
 
 import gomoku
-from random_agent import random_dummy_player
-from gomoku_ai_marius_tng_webclient import gomoku_ai_marius_tng_webclient
-from gomoku_ai_random_webclient import gomoku_ai_random_webclient
+from game_log import game_log_writer, read_games
 import random
 import time
 import copy
+from collections import deque
 
 
 class competition:
@@ -20,19 +19,35 @@ class competition:
         self.players = []
         self.results = []
         self.bsize = bsize_
+        self.game_log = None
+        self.resume_games = {}
 
     def register_player(self, player_):
         """This method registers an AI player that the students have implemented.
         This player needs to be in a separate file."""
         self.players.append(player_)
 
+    def open_game_log(self, path, resume=True, fsync_every=16):
+        """All games that are played from now on are appended to the game log at path.
+        If resume is set, the games already in that log are not played again: their results are reused.
+        This allows a crashed competition to be restarted where it left off."""
+        self.close_game_log()
+        self.resume_games = {}
+        if resume:
+            for record in read_games(path):
+                key = (record["black"], record["white"])
+                self.resume_games.setdefault(key, deque()).append(record)
+        self.game_log = game_log_writer(path, fsync_every)
+
+    def close_game_log(self):
+        if self.game_log is not None:
+            self.game_log.close()
+            self.game_log = None
+
     def play_competition(self, maxtime_per_move=1000, tolerance=0.05):
         """This method runs the actual competition between the registered players.
         Each player plays each other player twice: once with black and once with white."""
         self.results = []
-        mtime = (
-            maxtime_per_move * (1.0 + tolerance) * 1000000
-        )  # operational maxtime in nanoseconds
         for i in range(len(self.players)):
             self.results.append(
                 [0.0] * len(self.players)
@@ -41,97 +56,135 @@ class competition:
             for j in range(len(self.players)):
                 if i == j:
                     continue  # players do not play themselves
-                self.players[i].new_game(True)  # player i is black
-                self.players[j].new_game(False)  # player j is white
-                game = gomoku.starting_state(bsize_=self.bsize)  # initialise the game
-                previous_move = ()
-                over = False
-                while not over:
-                    if game[1] % 2 == 1:  # black to move
-                        current_player = self.players[i]
-                        pid = i
-                        pid_other = j
-                    else:  # white to move
-                        current_player = self.players[j]
-                        pid = j
-                        pid_other = i
-                    random.seed(
-                        time.time_ns()
-                    )  # just in case the other player has tinkered with random.seed.
-                    start_time = time.time_ns()  # make deepcopy to avoid erroneous ai's to change the official board.
-
-                    bExcepted = False
-                    try:
-                        move = current_player.move(
-                            copy.deepcopy(game),
-                            previous_move,
-                            max_time_to_move=maxtime_per_move,
-                        )
-                    except:
-                        bExcepted = True
-                    stop_time = time.time_ns()
-
-                    if not bExcepted:
-                        # print(str((stop_time-start_time)/1000000)+"/"+str(maxtime_per_move*(1+tolerance)))
-                        ok, win, game = gomoku.move(
-                            game, move
-                        )  # perform the move, and obtain whether the move was valid (ok) and whether the move results in a win
-                        previous_move = move
-                        # Uncomment the follwing two lines if you want to watch the games unfold slowly:
-                        # time.sleep(1)
-                        # gomoku.pretty_board(game[0])
-
-                    bOverTime = (stop_time - start_time) > mtime
-
-                    if bExcepted:
-                        print(
-                            "disqualified for exception: player "
-                            + str(self.players[pid].id())
-                        )
-                        over = True
-                        self.results[pid][pid_other] -= 1
-                    elif not ok:
-                        # player who made the illegal move should be disqualified. This needs to be done manually.
-                        print(
-                            "disqualified for illegal move: player "
-                            + str(self.players[pid].id())
-                        )
-                        over = True
-                        self.results[pid][pid_other] -= 1
-                    elif bOverTime:
-                        # player who made the illegal move should be disqualified. This needs to be done manually.
-                        print(
-                            "disqualified for exceeding maximum time per move: player "
-                            + str(self.players[pid].id())
-                        )
-                        if (
-                            stop_time - start_time
-                        ) > 2 * mtime:  # over time by factor 2 cannot be allowed.
-                            over = True
-                            self.results[pid][pid_other] -= 1
-
-                    if bExcepted or (not ok) or bOverTime:
-                        print("on board: ")
-                        gomoku.pretty_board(game[0])
-                        print(
-                            "trying to play: ("
-                            + str(move[0])
-                            + ","
-                            + str(move[1])
-                            + ")"
-                        )
-                        if game[1] % 2 == 1:
-                            print("as black")
-                        else:
-                            print("as white")
-                    if win:
-                        over = True
-                        self.results[pid][pid_other] += 1
-                    elif len(gomoku.valid_moves(game)) == 0:
-                        # if there are no more valid moves, the board is full and it's a draw
-                        over = True
-                        self.results[pid][pid_other] += 0.5
-                        self.results[pid_other][pid] += 0.5
+                key = (self.players[i].id(), self.players[j].id())
+                if self.resume_games.get(key):
+                    # already played before the competition was interrupted.
+                    record = self.resume_games[key].popleft()
+                else:
+                    record = self.play_game(i, j, maxtime_per_move, tolerance)
+                    if self.game_log is not None:
+                        self.game_log.write_game(record)
+                self.results[i][j] += record["score"][0]
+                self.results[j][i] += record["score"][1]
+
+    def play_game(self, i, j, maxtime_per_move=1000, tolerance=0.05):
+        """Plays a single game between player i (black) and player j (white).
+        Returns the game record, as described in game_log."""
+        mtime = (
+            maxtime_per_move * (1.0 + tolerance) * 1000000
+        )  # operational maxtime in nanoseconds
+        seed = time.time_ns()
+        record = {
+            "black": self.players[i].id(),
+            "white": self.players[j].id(),
+            "bsize": self.bsize,
+            "seed": seed,
+            "maxtime_per_move": maxtime_per_move,
+            "tolerance": tolerance,
+            "moves": [],
+            "times_ns": [],
+            "winner": None,
+            "reason": "",
+            "score": [0.0, 0.0],
+        }
+        self.players[i].new_game(True)  # player i is black
+        self.players[j].new_game(False)  # player j is white
+        game = gomoku.starting_state(bsize_=self.bsize)  # initialise the game
+        previous_move = ()
+        over = False
+        while not over:
+            if game[1] % 2 == 1:  # black to move
+                current_player = self.players[i]
+                colour = 0  # index in record["score"]
+            else:  # white to move
+                current_player = self.players[j]
+                colour = 1
+            random.seed(
+                seed + game[1]
+            )  # just in case the other player has tinkered with random.seed. Logged, for reproducibility.
+            start_time = time.time_ns()  # make deepcopy to avoid erroneous ai's to change the official board.
+
+            bExcepted = False
+            ok = True
+            win = False
+            move = ()
+            try:
+                move = current_player.move(
+                    copy.deepcopy(game),
+                    previous_move,
+                    max_time_to_move=maxtime_per_move,
+                )
+            except:
+                bExcepted = True
+            stop_time = time.time_ns()
+
+            if not bExcepted:
+                # print(str((stop_time-start_time)/1000000)+"/"+str(maxtime_per_move*(1+tolerance)))
+                try:
+                    next_game = gomoku.move(game, move)  # perform the move. None means the move was invalid.
+                except (IndexError, TypeError):
+                    next_game = None  # not even a move on the board
+                ok = next_game is not None
+                if ok:
+                    game = next_game
+                    win = gomoku.check_win(game[0], move)  # whether the move results in a win
+                    previous_move = move
+                    record["moves"].append([int(move[0]), int(move[1])])
+                    record["times_ns"].append(stop_time - start_time)
+                # Uncomment the follwing two lines if you want to watch the games unfold slowly:
+                # time.sleep(1)
+                # gomoku.pretty_board(game[0])
+
+            bOverTime = (stop_time - start_time) > mtime
+
+            if bExcepted:
+                print(
+                    "disqualified for exception: player " + str(current_player.id())
+                )
+                over = True
+                record["reason"] = "exception"
+            elif not ok:
+                # player who made the illegal move should be disqualified. This needs to be done manually.
+                print(
+                    "disqualified for illegal move: player " + str(current_player.id())
+                )
+                over = True
+                record["reason"] = "illegal"
+            elif bOverTime:
+                # player who made the illegal move should be disqualified. This needs to be done manually.
+                print(
+                    "disqualified for exceeding maximum time per move: player "
+                    + str(current_player.id())
+                )
+                if (
+                    stop_time - start_time
+                ) > 2 * mtime:  # over time by factor 2 cannot be allowed.
+                    over = True
+                    record["reason"] = "overtime"
+
+            if bExcepted or (not ok) or bOverTime:
+                print("on board: ")
+                gomoku.pretty_board(game[0])
+                print("trying to play: " + str(move))
+                if game[1] % 2 == 1:
+                    print("as black")
+                else:
+                    print("as white")
+            if over:
+                # disqualified: penalised, the opponent is considered the winner.
+                record["score"][colour] -= 1
+                record["winner"] = "white" if colour == 0 else "black"
+            elif win:
+                over = True
+                record["score"][colour] += 1
+                record["winner"] = "black" if colour == 0 else "white"
+                record["reason"] = "win"
+            elif len(gomoku.valid_moves(game)) == 0:
+                # if there are no more valid moves, the board is full and it's a draw
+                over = True
+                record["score"] = [0.5, 0.5]
+                record["reason"] = "draw"
+        return record
 
     def print_scores(self):
         """This method prints the results of the competition to sysout"""
@@ -146,17 +199,26 @@ class competition:
 # Now follows the main script for running the competition
 # At present the competition consists of just three random dummy players playing each other
 # When the students submit a player file, they should be entered one by one.
-game = gomoku.starting_state()
-
-aiPlayerMariusTng = gomoku_ai_marius_tng_webclient()
-randdum = random_dummy_player()
-
-comp = competition()
-comp.register_player(aiPlayerMariusTng)
-comp.register_player(randdum)
-# register any additional ai's here
-
-nofCompetitions = 1
-for i in range(nofCompetitions):
-    comp.play_competition()
-    comp.print_scores()
+if __name__ == "__main__":
+    # the players are imported here: importing competition (e.g. in a worker process) doesn't load
+    # the webclients (and requests).
+    from random_agent import random_dummy_player
+    from gomoku_ai_marius_tng_webclient import gomoku_ai_marius_tng_webclient
+    from gomoku_ai_random_webclient import gomoku_ai_random_webclient
+
+    aiPlayerMariusTng = gomoku_ai_marius_tng_webclient()
+    randdum = random_dummy_player()
+
+    comp = competition()
+    comp.register_player(aiPlayerMariusTng)
+    comp.register_player(randdum)
+    # register any additional ai's here
+
+    # Uncomment the line below to record all games, and to resume the competition from that log after a crash:
+    # comp.open_game_log("competition_games.log")
+
+    nofCompetitions = 1
+    for i in range(nofCompetitions):
+        comp.play_competition()
+        comp.print_scores()
+    comp.close_game_log()
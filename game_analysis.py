@@ -0,0 +1,273 @@
+# Analysis of recorded games (see game_log.py).
+# The games are loaded once into flat numpy arrays (one array per column), after which all
+# statistics are computed with vectorised numpy operations. That keeps it fast for millions of moves.
+#
+# usage: python game_analysis.py competition_games.log [more logs ...]
+
+import sys
+
+import numpy as np
+
+from game_log import read_games
+
+REASONS = ["win", "draw", "exception", "illegal", "overtime"]
+
+
+class game_table:
+    """Columnar view on a set of recorded games.
+    Per game columns (index = game number):
+        black, white: index in self.agents
+        bsize, maxtime_per_move (ms), tolerance, length (number of moves)
+        winner: 1 for black, -1 for white, 0 for a draw
+        reason: index in REASONS
+        move_start: index of the first move of the game in the per move columns
+    Per move columns (index = move number, all games after each other):
+        game, ply (1 for the first move), agent (index in self.agents), row, col
+        time_ns: the time the agent spent on the move
+    """
+
+    def __init__(self, paths):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.agents = []
+        agent_index = {}
+
+        def index_of(agent):
+            if agent not in agent_index:
+                agent_index[agent] = len(self.agents)
+                self.agents.append(agent)
+            return agent_index[agent]
+
+        black, white, bsize, maxtime, tolerance = [], [], [], [], []
+        length, winner, reason = [], [], []
+        moves, times_ns = [], []
+        for path in paths:
+            for record in read_games(path):
+                black.append(index_of(record["black"]))
+                white.append(index_of(record["white"]))
+                bsize.append(record["bsize"])
+                maxtime.append(record["maxtime_per_move"])
+                tolerance.append(record["tolerance"])
+                length.append(len(record["moves"]))
+                winner.append(
+                    {"black": 1, "white": -1}.get(record["winner"], 0)
+                )
+                reason.append(REASONS.index(record["reason"]))
+                moves.extend(record["moves"])
+                times_ns.extend(record["times_ns"])
+
+        self.black = np.array(black, dtype=np.int32)
+        self.white = np.array(white, dtype=np.int32)
+        self.bsize = np.array(bsize, dtype=np.int32)
+        self.maxtime_per_move = np.array(maxtime, dtype=np.float64)
+        self.tolerance = np.array(tolerance, dtype=np.float64)
+        self.length = np.array(length, dtype=np.int32)
+        self.winner = np.array(winner, dtype=np.int8)
+        self.reason = np.array(reason, dtype=np.int8)
+        self.move_start = np.zeros(len(length), dtype=np.int64)
+        np.cumsum(self.length[:-1], out=self.move_start[1:])
+
+        nof_games = len(self.length)
+        self.game = np.repeat(np.arange(nof_games, dtype=np.int32), self.length)
+        self.ply = (
+            np.arange(len(self.game), dtype=np.int32)
+            - self.move_start[self.game]
+            + 1
+        ).astype(np.int32)
+        black_to_move = self.ply % 2 == 1
+        self.agent = np.where(
+            black_to_move, self.black[self.game], self.white[self.game]
+        )
+        move_array = np.array(moves, dtype=np.int16).reshape(-1, 2)
+        self.row = move_array[:, 0]
+        self.col = move_array[:, 1]
+        self.time_ns = np.array(times_ns, dtype=np.int64)
+
+    def nof_games(self):
+        return len(self.length)
+
+    def limit_ns(self):
+        """Per move: the time after which the move counts as overtime, maxtime_per_move * (1 + tolerance)."""
+        game_limit = self.maxtime_per_move * (1.0 + self.tolerance) * 1000000
+        return game_limit[self.game]
+
+    def move_time_profile(self, near_timeout=0.9):
+        """Per agent: a dict with the move-time distribution in ms, and how often the agent came
+        near (>= near_timeout * limit) or over the overtime limit."""
+        time_ms = self.time_ns / 1000000
+        fraction = self.time_ns / self.limit_ns()
+        count = np.bincount(self.agent, minlength=len(self.agents))
+        near = np.bincount(
+            self.agent, weights=fraction >= near_timeout, minlength=len(self.agents)
+        )
+        over = np.bincount(
+            self.agent, weights=fraction > 1.0, minlength=len(self.agents)
+        )
+        profiles = {}
+        # sort once by agent and time, so the percentiles of every agent are a slice.
+        order = np.lexsort((time_ms, self.agent))
+        sorted_ms = time_ms[order]
+        ends = np.cumsum(count)
+        for agent, name in enumerate(self.agents):
+            times = sorted_ms[ends[agent] - count[agent] : ends[agent]]
+            if len(times) == 0:
+                continue
+            p50, p90, p99 = np.percentile(times, [50, 90, 99])
+            profiles[name] = {
+                "moves": int(count[agent]),
+                "mean_ms": float(times.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(times[-1]),
+                "near_timeout": float(near[agent] / count[agent]),
+                "overtime": float(over[agent] / count[agent]),
+            }
+        return profiles
+
+    def move_time_histogram(self, agent, bins=20):
+        """Histogram of the move times of agent, relative to the overtime limit (1.0 == the limit).
+        Returns (counts, bin_edges) as np.histogram does."""
+        mask = self.agent == self.agents.index(agent)
+        fraction = self.time_ns[mask] / self.limit_ns()[mask]
+        top = max(1.0, float(fraction.max())) if len(fraction) else 1.0
+        return np.histogram(fraction, bins=bins, range=(0.0, top))
+
+    def win_rates_by_colour(self):
+        """Per agent and colour: the number of games, wins, draws and losses."""
+        rates = {}
+        n = len(self.agents)
+        for colour, agents, sign in (("black", self.black, 1), ("white", self.white, -1)):
+            games = np.bincount(agents, minlength=n)
+            wins = np.bincount(agents, weights=self.winner == sign, minlength=n)
+            draws = np.bincount(agents, weights=self.winner == 0, minlength=n)
+            for agent, name in enumerate(self.agents):
+                if games[agent] == 0:
+                    continue
+                rates.setdefault(name, {})[colour] = {
+                    "games": int(games[agent]),
+                    "wins": int(wins[agent]),
+                    "draws": int(draws[agent]),
+                    "losses": int(games[agent] - wins[agent] - draws[agent]),
+                    "win_rate": float(wins[agent] / games[agent]),
+                }
+        return rates
+
+    def openings(self, plies=3):
+        """Per game: the first plies moves as an (nof_games, plies) array of cell numbers (row*bsize+col).
+        Games that are shorter are padded with -1."""
+        opening = np.full((self.nof_games(), plies), -1, dtype=np.int32)
+        for k in range(plies):
+            has_move = self.length > k
+            index = self.move_start[has_move] + k
+            opening[has_move, k] = (
+                self.row[index].astype(np.int32) * self.bsize[has_move]
+                + self.col[index]
+            )
+        return opening
+
+    def win_rates_by_opening(self, plies=3, min_games=1):
+        """Per board size and opening (tuple of the first plies moves as (row,col)): the number of games,
+        and the fraction of black wins, draws and white wins. Sorted by the number of games."""
+        # the board size in front of the moves: the same cell numbers on another size are another opening
+        opening = np.column_stack((self.bsize, self.openings(plies)))
+        unique, inverse, games = np.unique(
+            opening, axis=0, return_inverse=True, return_counts=True
+        )
+        inverse = inverse.reshape(-1)
+        black_wins = np.bincount(inverse, weights=self.winner == 1)
+        draws = np.bincount(inverse, weights=self.winner == 0)
+        result = []
+        for k in np.argsort(-games, kind="stable"):
+            if games[k] < min_games:
+                continue
+            size = int(unique[k][0])
+            moves = tuple((int(c) // size, int(c) % size) for c in unique[k][1:] if c >= 0)
+            result.append(
+                {
+                    "bsize": size,
+                    "opening": moves,
+                    "games": int(games[k]),
+                    "black_wins": float(black_wins[k] / games[k]),
+                    "draws": float(draws[k] / games[k]),
+                    "white_wins": float(1.0 - (black_wins[k] + draws[k]) / games[k]),
+                }
+            )
+        return result
+
+    def game_length_distribution(self):
+        """Returns an array with at index n the number of games that lasted n moves."""
+        return np.bincount(self.length)
+
+    def reason_counts(self):
+        counts = np.bincount(self.reason, minlength=len(REASONS))
+        return {REASONS[k]: int(counts[k]) for k in range(len(REASONS))}
+
+
+def print_report(table, near_timeout=0.9, opening_plies=3, nof_openings=10):
+    print(
+        str(table.nof_games()) + " games, " + str(len(table.time_ns)) + " moves"
+    )
+    print("game endings: " + str(table.reason_counts()))
+
+    print("-----------------")
+    print("move times (ms), near timeout means >= " + str(near_timeout) + " of the limit")
+    for name, profile in table.move_time_profile(near_timeout).items():
+        print(
+            "{}: moves={} mean={:.1f} p50={:.1f} p90={:.1f} p99={:.1f} max={:.1f} near_timeout={:.2%} overtime={:.2%}".format(
+                name,
+                profile["moves"],
+                profile["mean_ms"],
+                profile["p50_ms"],
+                profile["p90_ms"],
+                profile["p99_ms"],
+                profile["max_ms"],
+                profile["near_timeout"],
+                profile["overtime"],
+            )
+        )
+
+    print("-----------------")
+    print("win rates by colour")
+    for name, colours in table.win_rates_by_colour().items():
+        for colour, rate in colours.items():
+            print(
+                "{} as {}: games={} wins={} draws={} losses={} win_rate={:.2%}".format(
+                    name,
+                    colour,
+                    rate["games"],
+                    rate["wins"],
+                    rate["draws"],
+                    rate["losses"],
+                    rate["win_rate"],
+                )
+            )
+
+    print("-----------------")
+    print("most played openings (first " + str(opening_plies) + " moves)")
+    for opening in table.win_rates_by_opening(opening_plies)[:nof_openings]:
+        print(
+            "{}x{} {}: games={} black={:.2%} draw={:.2%} white={:.2%}".format(
+                opening["bsize"],
+                opening["bsize"],
+                opening["opening"],
+                opening["games"],
+                opening["black_wins"],
+                opening["draws"],
+                opening["white_wins"],
+            )
+        )
+
+    print("-----------------")
+    lengths = table.length
+    if len(lengths):
+        p10, p50, p90 = np.percentile(lengths, [10, 50, 90])
+        print(
+            "game length: min={} p10={:.0f} p50={:.0f} p90={:.0f} max={}".format(
+                lengths.min(), p10, p50, p90, lengths.max()
+            )
+        )
+
+
+if __name__ == "__main__":
+    print_report(game_table(sys.argv[1:]))
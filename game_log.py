@@ -0,0 +1,100 @@
+import json
+import mmap
+import os
+
+
+# The game log is an append-only file with one json record per line (newline-delimited json).
+# Every line describes one finished game, e.g.:
+# {"black": "Marius TNG", "white": "random_player", "bsize": 19, "seed": 1234,
+#  "maxtime_per_move": 1000, "tolerance": 0.05,
+#  "moves": [[9, 9], [9, 10], ...], "times_ns": [1200345, 999870021, ...],
+#  "winner": "black", "reason": "win", "score": [1.0, 0.0]}
+# - moves and times_ns run in parallel: times_ns[k] is the time spent on moves[k].
+# - winner is "black", "white" or null (draw).
+# - reason is one of: "win", "draw", "exception", "illegal", "overtime".
+#   For the last three the winner is the opponent of the disqualified player.
+# - score is the [black, white] contribution to the competition results.
+# A crash can at most leave a truncated last line. Readers skip it, writers terminate it.
+class game_log_writer:
+    def __init__(self, path, fsync_every=16):
+        """Opens (or creates) the log at path for appending.
+        The file is fsynced after every fsync_every games, and at close()."""
+        self.path = path
+        self.fsync_every = fsync_every
+        self.unsynced = 0
+        self.file = open(path, "ab")
+        if self.file.tell() > 0:
+            # make sure a line that was truncated by a crash does not glue onto the next record.
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write(b"\n")
+
+    def write_game(self, record):
+        """Appends one game record (a dict) to the log."""
+        self.file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()  # hand it to the os right away, so a crash of python itself loses nothing.
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        """Forces the written games to disk."""
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _decode_line(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None  # truncated by a crash
+
+
+def map_game_log(path):
+    """Returns a read-only memory map of the log at path, or None if the log is empty or missing.
+    NB: mmap refuses to map empty files."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def game_offsets(mm):
+    """Yields the (start, end) byte offsets of every line in a mapped log."""
+    pos = 0
+    size = len(mm)
+    while pos < size:
+        end = mm.find(b"\n", pos)
+        if end == -1:
+            end = size
+        if end > pos:
+            yield pos, end
+        pos = end + 1
+
+
+def read_games(path):
+    """Lazily yields the game records in the log at path, one at a time.
+    The log is memory mapped, so large logs are never loaded as a whole."""
+    mm = map_game_log(path)
+    if mm is None:
+        return
+    try:
+        for start, end in game_offsets(mm):
+            record = _decode_line(mm[start:end])
+            if record is not None:
+                yield record
+    finally:
+        mm.close()
@@ -1,7 +1,6 @@
 # update dec 2021: pretty board displays 1 as x and 2 as o, now,
 # just like in the tutorial.
 
-from numba import jit
 from typing import Tuple, List, Optional
 
 import numpy as np
@@ -43,8 +42,37 @@ def valid_moves(state: GameState) -> List[Move]:
         return list(zip(*np.where(board == 0)))
 
 
-@jit(nopython=True)
 def is_game_over(state: GameState) -> bool:
+    """Whether there are five in a row on the board.
+    Compiled with numba: the first call imports numba and loads (or, the very first time, compiles) the
+    compiled version, which replaces this function as gomoku.is_game_over. So importing gomoku stays cheap
+    for the modules that don't use it (the gui, the webclients, the competition); see also warmup."""
+    return _compiled_is_game_over()(state)
+
+
+def _compiled_is_game_over():
+    global is_game_over
+    if _compiled_functions:
+        return _compiled_functions["is_game_over"]
+    from numba import jit, types
+
+    # The signatures: a state with an int8 board (as starting_state makes), or an int32/int64 board
+    # (as np.array makes from a list of lists, on windows and elsewhere). They are compiled at once, and with
+    # cache=True the compiled code is stored on disk (in __pycache__), so only the very first run compiles:
+    # later runs, and every worker process, load it in milliseconds. A board of another type (uint8, a view...)
+    # is still accepted: it is compiled (and cached) at its first call.
+    compiled = jit(nopython=True, cache=True)(_is_game_over)
+    for dtype in (types.int8, types.int32, types.int64):
+        compiled.compile(types.boolean(types.Tuple((types.Array(dtype, 2, "C"), types.int64))))
+    _compiled_functions["is_game_over"] = compiled
+    is_game_over = _compiled_functions["is_game_over"]
+    return is_game_over
+
+
+_compiled_functions = {}
+
+
+def _is_game_over(state: GameState) -> bool:
     board = state[0]
     bsize = np.shape(board)[0]
 
@@ -211,6 +239,13 @@ def pretty_board(board: Board):
         print()
 
 
+def warmup():
+    """Makes sure the compiled functions are loaded and ready (numba is imported here, at the first call),
+    so the first call in a timed move is fast. Call it from new_game (or at the start of a worker process)."""
+    for dtype in (np.int8, np.int32, np.int64):
+        is_game_over((np.zeros((SIZE, SIZE), dtype=dtype), 1))
+
+
 def game_result(state: GameState):
     if state[1] % 2 == 0:
         return -1
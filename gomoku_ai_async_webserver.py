@@ -0,0 +1,571 @@
+# An asyncio webserver that serves the same move api as gomoku_ai_random_webserver (flask),
+# but handles many concurrent games: every request carries its own rules and board size,
+# and the (cpu bound) move computations run in a pool of worker processes, so the event loop
+# that handles the connections never blocks.
+#
+# usage: python gomoku_ai_async_webserver.py [--host 0.0.0.0] [--port 5000] [--workers 4]
+# then POST to http://host:port/make_gomoku_move/ai_random like to the flask server.
+#
+# Besides the stateless api, the server supports game sessions, in which only the last move is sent:
+#   POST   /make_gomoku_move/<ai>/session       the usual (full) request. Returns {"move": .., "session": id}
+#   POST   /make_gomoku_move/<ai>/session/<id>  {"last_move": .., "ply": .., "max_time_to_move": ..}
+#                                               returns {"move": ..}, or status 409 if the session is
+#                                               unknown or out of sync (then simply open a new session).
+#   DELETE /make_gomoku_move/<ai>/session/<id>  closes the session.
+# The server keeps the board of a session, and the ai object, in the same worker process for the whole game,
+# so an ai can reuse its search tree between moves.
+#
+# For bulk analysis and self-play there is a batch api, for many independent positions in one request:
+#   POST   /make_gomoku_move/<ai>/batch         {"jobs": [{"board": .., "ply": .., "last_move": .., "black": ..}, ..],
+#                                                "max_time_to_move": .., "winningSeries": .., "boardSize": ..}
+# The fields outside "jobs" are shared by all jobs (a job can override them). The jobs are spread over
+# all workers, and the results are streamed back (chunked, one json line per job) in the order in which
+# they complete: {"index": <index of the job>, "move": ..}, or {"index": .., "Error": ..} if the job failed.
+#
+# Requests and responses are json, or the compact binary encoding of gomoku_wire,
+# if the request is posted with content type gomoku_wire.REQUEST_TYPE.
+#
+# GET /metrics returns the metrics of the server (see gomoku_metrics) as plain text.
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import gomoku
+import gomoku_wire
+from gomoku_metrics import TEXT_TYPE, server_metrics
+from gomoku_ai_random import gomoku_random_ai_webServer
+
+# The ai's that are served, by name: /make_gomoku_move/<name>.
+# The value is a class (or other picklable callable) that creates an object with a move(dic) method,
+# like gomoku_random_ai_webServer. A new one is made for every request, in a worker process.
+DEFAULT_AIS = {"ai_random": gomoku_random_ai_webServer}
+
+MOVE_PATH = "/make_gomoku_move/"
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 1000000
+MAX_BATCH_BODY_SIZE = 64000000
+SESSION_TIMEOUT = 600  # seconds. Sessions that are idle for longer are closed.
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def compute_move(ai_class, dic):
+    """Runs in a worker process."""
+    return _timed_move(ai_class(), dic)
+
+
+def _timed_move(ai, dic):
+    # returns the move, the playouts the ai reports (if any) and the time it took (ms)
+    start_time = time.perf_counter()
+    move = ai.move(dic)
+    ms = (time.perf_counter() - start_time) * 1000
+    return [int(move[0]), int(move[1])], getattr(ai, "playouts", None), ms
+
+
+def compute_moves(ai_class, dics):
+    """Runs in a worker process. A chunk of batch jobs in one go, to save the overhead per job.
+    Returns the result of compute_move, or the error message, per job."""
+    results = []
+    for dic in dics:
+        try:
+            results.append(compute_move(ai_class, dic))
+        except Exception as error:
+            results.append(str(error) or type(error).__name__)
+    return results
+
+
+# The sessions that live in this worker process, by id: {"ai": .., "dic": the request with the current board}
+_sessions = {}
+
+
+class session_error(Exception):
+    pass
+
+
+def _stone(ply):
+    # the value of the stone placed at ply. Black moves at odd plies.
+    return 2 if ply % 2 == 1 else 1
+
+
+def worker_open_session(ai_class, session_id, dic):
+    """Runs in a worker process."""
+    dic = dict(dic)
+    dic["board"] = [list(row) for row in dic["board"]]
+    session = {"ai": ai_class(), "dic": dic}
+    _sessions[session_id] = session
+    return _session_move(session)
+
+
+def worker_session_move(session_id, request):
+    """Runs in a worker process."""
+    session = _sessions.get(session_id)
+    if session is None:
+        raise session_error("unknown session")
+    dic = session["dic"]
+    last_move = request["last_move"]
+    if request["ply"] != dic["ply"] + 1 or last_move is None:
+        raise session_error("out of sync")
+    board = dic["board"]
+    row, col = last_move
+    if not (0 <= row < len(board) and 0 <= col < len(board[0])) or board[row][col] != 0:
+        raise session_error("out of sync")
+    board[row][col] = _stone(dic["ply"])
+    dic["ply"] = request["ply"]
+    dic["last_move"] = last_move
+    dic["max_time_to_move"] = request["max_time_to_move"]
+    return _session_move(session)
+
+
+def _session_move(session):
+    dic = session["dic"]
+    request = dict(dic)
+    request["board"] = [row[:] for row in dic["board"]]  # the ai may not change the board of the session
+    result = _timed_move(session["ai"], request)
+    move = result[0]
+    dic["board"][move[0]][move[1]] = _stone(dic["ply"])
+    dic["ply"] += 1
+    return result
+
+
+def worker_close_session(session_id):
+    """Runs in a worker process."""
+    _sessions.pop(session_id, None)
+
+
+class http_error(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class gomoku_async_webServer:
+    def __init__(self, ais=None, workers=None, max_pending=1000, initializer=None):
+        """ais: the served ai's (see DEFAULT_AIS).
+        workers: the number of worker processes (default: the number of cpu's).
+        initializer: called in every worker process when it starts, e.g. gomoku.warmup.
+        max_pending: requests beyond this number of pending move computations are refused (503),
+        instead of queueing up and letting the latency of all games run out of hand."""
+        self.ais = dict(DEFAULT_AIS if ais is None else ais)
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.max_pending = max_pending
+        self.initializer = initializer
+        self.pending = 0
+        self.pools = []  # one single-process pool per worker, so a session can stick to its worker
+        self.pool_pending = []
+        self.sessions = {}  # session id -> [worker index, time of last use]
+        self.server = None
+        self.reaper = None
+        self.metrics = server_metrics()
+        self.metrics.add_gauge(
+            "gomoku_pending_moves", "Move computations in the workers or waiting for one.", lambda: self.pending
+        )
+        self.metrics.add_gauge(
+            "gomoku_queue_depth",
+            "Move computations waiting for a worker.",
+            lambda: sum(max(pending - 1, 0) for pending in self.pool_pending),
+        )
+        self.metrics.add_gauge("gomoku_workers", "Worker processes.", lambda: self.workers)
+        self.metrics.add_gauge("gomoku_sessions", "Open game sessions.", lambda: len(self.sessions))
+
+    async def start(self, host="127.0.0.1", port=5000):
+        self.pools = [ProcessPoolExecutor(max_workers=1, initializer=self.initializer) for _ in range(self.workers)]
+        # the processes start at the first job: start (and warm up) them now, not in the first game
+        await asyncio.gather(*(asyncio.wrap_future(pool.submit(int)) for pool in self.pools))
+        self.pool_pending = [0] * self.workers
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        self.reaper = asyncio.ensure_future(self.reap_idle_sessions())
+        return self.server
+
+    async def serve_forever(self, host="127.0.0.1", port=5000):
+        await self.start(host, port)
+        try:
+            await self.server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.reaper is not None:
+            self.reaper.cancel()
+        for pool in self.pools:
+            pool.shutdown(cancel_futures=True)
+
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    def least_busy_worker(self):
+        return self.pool_pending.index(min(self.pool_pending))
+
+    async def run_in_worker(self, worker, function, *args):
+        """Runs function(*args) in worker process number worker (None: the least busy one)."""
+        if self.pending >= self.max_pending:
+            raise http_error(503, "server too busy")
+        if worker is None:
+            worker = self.least_busy_worker()
+        self.pending += 1
+        self.pool_pending[worker] += 1
+        pool = self.pools[worker]
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+        except BrokenProcessPool:
+            self.restart_worker(worker, pool)
+            raise
+        finally:
+            self.pending -= 1
+            self.pool_pending[worker] -= 1
+
+    def restart_worker(self, worker, pool):
+        """Replaces the pool of worker number worker after its process died (e.g. killed, or out of memory):
+        a broken pool refuses every later job. The sessions in it are lost: their next move gets a 409,
+        after which the client opens a new session."""
+        if self.pools[worker] is not pool:
+            return  # already replaced, after another request that failed on it
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.pools[worker] = ProcessPoolExecutor(max_workers=1, initializer=self.initializer)
+        for session_id, (session_worker, last_used) in list(self.sessions.items()):
+            if session_worker == worker:
+                del self.sessions[session_id]
+
+    # ******************************************************
+    # http handling (http/1.1 with keep-alive)
+    # ******************************************************
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except http_error as error:
+                    # the body is not read (no valid content-length, or too large): answer, and close the connection
+                    self.metrics.request_started()
+                    self.write_response(writer, *self.error_response(error.status, error.message), keep_alive=False)
+                    self.metrics.request_done("other", error.status, 0.0)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                start_time = time.perf_counter()
+                self.metrics.request_started()
+                status, server_time_ms = 500, None  # if the connection breaks
+                try:
+                    try:
+                        status, content_type, response = await self.dispatch(
+                            method, path, headers, body
+                        )
+                    except http_error as error:
+                        status, content_type, response = self.error_response(
+                            error.status, error.message
+                        )
+                    except Exception as error:
+                        # the request was valid (see request_dic), so it's a failure of the server or the ai
+                        status, content_type, response = self.error_response(
+                            500, str(error) or type(error).__name__
+                        )
+                    server_time_ms = (time.perf_counter() - start_time) * 1000
+                    await self.network_delay()
+                    if method == "HEAD":
+                        response = b""  # e.g. a client that just sets up its connection
+                    if isinstance(response, bytes):
+                        self.write_response(
+                            writer, status, content_type, response, keep_alive, server_time_ms
+                        )
+                    else:
+                        await self.write_stream(writer, status, content_type, response, keep_alive)
+                        # a stream is done when all of it has been sent
+                        server_time_ms = (time.perf_counter() - start_time) * 1000
+                    await writer.drain()
+                finally:
+                    if server_time_ms is None:
+                        server_time_ms = (time.perf_counter() - start_time) * 1000
+                    self.metrics.request_done(self.endpoint(method, path), status, server_time_ms)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # the server is shutting down: end the connection quietly
+        finally:
+            writer.close()
+
+    async def network_delay(self):
+        """Hook for simulating network latency (see local_ai_server). No delay by default."""
+        pass
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None  # connection closed by the client
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ConnectionError("malformed request line")
+        method, path, version = parts
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if version == "HTTP/1.0" and "connection" not in headers:
+            headers["connection"] = "close"
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise http_error(400, "invalid content-length")
+        if length > (MAX_BATCH_BODY_SIZE if path.endswith("/batch") else MAX_BODY_SIZE):
+            raise http_error(413, "request too large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method, path, headers, body
+
+    def write_response(
+        self, writer, status, content_type, body, keep_alive=True, server_time_ms=0.0
+    ):
+        # Server-Timing tells the client how much of the round trip was spent in the server,
+        # so it can estimate the network overhead.
+        head = (
+            "HTTP/1.1 {} {}\r\n"
+            "Content-Type: {}\r\n"
+            "Content-Length: {}\r\n"
+            "Connection: {}\r\n"
+            "Server-Timing: move;dur={:.1f}\r\n"
+            "\r\n"
+        ).format(
+            status,
+            REASONS.get(status, ""),
+            content_type,
+            len(body),
+            "keep-alive" if keep_alive else "close",
+            server_time_ms,
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    async def write_stream(self, writer, status, content_type, lines, keep_alive=True):
+        """Writes the (bytes) lines of an async generator as they come, with chunked transfer encoding."""
+        head = (
+            "HTTP/1.1 {} {}\r\n"
+            "Content-Type: {}\r\n"
+            "Transfer-Encoding: chunked\r\n"
+            "Connection: {}\r\n"
+            "\r\n"
+        ).format(
+            status,
+            REASONS.get(status, ""),
+            content_type,
+            "keep-alive" if keep_alive else "close",
+        )
+        writer.write(head.encode("latin-1"))
+        async for line in lines:
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+
+    def json_response(self, dic, status=200):
+        return status, "application/json", json.dumps(dic).encode()
+
+    def error_response(self, status, message):
+        return self.json_response({"Error": message}, status)
+
+    # ******************************************************
+    # the api
+    # ******************************************************
+
+    def endpoint(self, method, path):
+        """The name of the endpoint of a request, for the metrics."""
+        if path.startswith(MOVE_PATH):
+            parts = path[len(MOVE_PATH) :].split("/")
+            if len(parts) == 1:
+                return "move"
+            if parts[1] == "batch":
+                return "batch"
+            if parts[1] == "session":
+                if len(parts) == 2:
+                    return "session_open"
+                return "session_close" if method == "DELETE" else "session_move"
+        if path == "/metrics":
+            return "metrics"
+        return "other"
+
+    def move_done(self, dic, result):
+        move, playouts, ms = result
+        self.metrics.move_done(ms, dic.get("max_time_to_move"), playouts)
+        return move
+
+    async def dispatch(self, method, path, headers, body):
+        if path == "/metrics" and method in ("GET", "HEAD"):
+            return 200, TEXT_TYPE, self.metrics.text().encode()
+        if path.startswith(MOVE_PATH):
+            parts = path[len(MOVE_PATH) :].split("/")
+            if parts[0] not in self.ais:
+                raise http_error(404, "unknown ai: " + parts[0])
+            if len(parts) == 1 and method == "POST":
+                return await self.make_move(parts[0], headers, body)
+            if len(parts) == 2 and parts[1] == "batch" and method == "POST":
+                return self.batch(parts[0], body)
+            if len(parts) == 2 and parts[1] == "session" and method == "POST":
+                return await self.open_session(parts[0], headers, body)
+            if len(parts) == 3 and parts[1] == "session":
+                if method == "POST":
+                    return await self.session_move(parts[2], headers, body)
+                if method == "DELETE":
+                    return await self.close_session(parts[2])
+            raise http_error(405, "unsupported: " + method + " " + path)
+        raise http_error(404, "unknown path: " + path)
+
+    def is_binary(self, headers):
+        return headers.get("content-type", "").startswith(gomoku_wire.REQUEST_TYPE)
+
+    def request_dic(self, headers, body):
+        try:
+            if self.is_binary(headers):
+                return gomoku_wire.decode_request(body)
+            dic = json.loads(body) if body else None
+        except (struct.error, ValueError) as error:
+            raise http_error(400, "invalid request: " + str(error))
+        if not dic:
+            raise http_error(400, "data missing")
+        return dic
+
+    def move_response(self, headers, move, session=None):
+        # answer in the encoding of the request
+        if self.is_binary(headers):
+            return 200, gomoku_wire.RESPONSE_TYPE, gomoku_wire.encode_response(move, session)
+        dic = {"move": move}
+        if session is not None:
+            dic["session"] = session
+        return self.json_response(dic)
+
+    async def make_move(self, ai_name, headers, body):
+        dic = self.request_dic(headers, body)
+        result = await self.run_in_worker(None, compute_move, self.ais[ai_name], dic)
+        return self.move_response(headers, self.move_done(dic, result))
+
+    def batch(self, ai_name, body):
+        try:
+            batch = json.loads(body) if body else None
+        except ValueError as error:
+            raise http_error(400, "invalid request: " + str(error))
+        if not isinstance(batch, dict) or not isinstance(batch.get("jobs"), list):
+            raise http_error(400, "jobs missing")
+        shared = {key: value for key, value in batch.items() if key != "jobs"}
+        dics = []
+        for job in batch["jobs"]:
+            dic = dict(shared)
+            dic.update(job)
+            dic.setdefault("last_move", None)
+            dics.append(dic)
+        return 200, "application/x-ndjson", self.batch_results(ai_name, dics)
+
+    async def batch_results(self, ai_name, dics):
+        """Yields a json line per job, as they complete.
+        The jobs go to the workers in chunks, small enough to keep all workers busy until the end,
+        and never more than two chunks per worker at a time, so one batch doesn't exhaust max_pending."""
+        chunk_size = max(1, min(16, len(dics) // (self.workers * 4)))
+        chunks = [
+            list(range(start, min(start + chunk_size, len(dics))))
+            for start in range(0, len(dics), chunk_size)
+        ]
+        slots = asyncio.Semaphore(2 * self.workers)
+
+        async def run_chunk(indices):
+            async with slots:
+                try:
+                    results = await self.run_in_worker(
+                        None, compute_moves, self.ais[ai_name], [dics[i] for i in indices]
+                    )
+                except Exception as error:
+                    results = [getattr(error, "message", None) or str(error)] * len(indices)
+            return indices, results
+
+        tasks = [asyncio.ensure_future(run_chunk(indices)) for indices in chunks]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, results = await next_done
+                lines = []
+                for index, result in zip(indices, results):
+                    if isinstance(result, str):
+                        lines.append({"index": index, "Error": result})
+                    else:
+                        lines.append({"index": index, "move": self.move_done(dics[index], result)})
+                yield "".join(json.dumps(line) + "\n" for line in lines).encode()
+        finally:
+            for task in tasks:
+                task.cancel()  # the client is gone
+
+    async def open_session(self, ai_name, headers, body):
+        dic = self.request_dic(headers, body)
+        session_id = uuid.uuid4().hex
+        worker = self.least_busy_worker()
+        self.sessions[session_id] = [worker, time.monotonic()]
+        try:
+            result = await self.run_in_worker(
+                worker, worker_open_session, self.ais[ai_name], session_id, dic
+            )
+        except Exception:
+            del self.sessions[session_id]
+            raise
+        return self.move_response(headers, self.move_done(dic, result), session_id)
+
+    async def session_move(self, session_id, headers, body):
+        request = self.request_dic(headers, body)
+        if session_id not in self.sessions:
+            raise http_error(409, "unknown session")
+        session = self.sessions[session_id]
+        session[1] = time.monotonic()
+        try:
+            result = await self.run_in_worker(
+                session[0], worker_session_move, session_id, request
+            )
+        except session_error as error:
+            await self.close_session(session_id)
+            raise http_error(409, str(error))
+        return self.move_response(headers, self.move_done(request, result))
+
+    async def close_session(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.pools[session[0]].submit(worker_close_session, session_id)
+        return self.json_response({})
+
+    async def reap_idle_sessions(self):
+        # also on a server that gets no new sessions, the idle ones are closed
+        while True:
+            await asyncio.sleep(SESSION_TIMEOUT / 10)
+            self.close_idle_sessions()
+
+    def close_idle_sessions(self):
+        now = time.monotonic()
+        for session_id, (worker, last_used) in list(self.sessions.items()):
+            if now - last_used > SESSION_TIMEOUT:
+                del self.sessions[session_id]
+                self.pools[worker].submit(worker_close_session, session_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio gomoku move server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(gomoku_async_webServer(workers=args.workers, initializer=gomoku.warmup).serve_forever(args.host, args.port))
@@ -0,0 +1,83 @@
+# The random gomoku ai that gomoku_ai_random_webserver (flask) and gomoku_ai_async_webserver serve.
+# Without flask, so the worker processes of the async server (that unpickle gomoku_random_ai_webServer)
+# don't import flask.
+import random
+import time
+
+
+class GmGameRules:
+    winningSeries = 5  # defaults. Every request gets its own instance, with the values of that request.
+    BOARDWIDTH = 19
+    BOARDHEIGHT = 19
+
+    def __init__(self, winningSeries=5, boardSize=19):
+        # instance attributes, so concurrent requests don't influence each other.
+        self.winningSeries = winningSeries
+        self.BOARDWIDTH = boardSize
+        self.BOARDHEIGHT = boardSize
+
+
+def isValidMove(board, column, row):
+    # Returns True if there is an empty space in the given column.
+    # Otherwise returns False.
+    return (
+        (column >= 0)
+        and (column < len(board))
+        and (row >= 0)
+        and (row < len(board[0]))
+        and (board[column][row] == 0)
+    )
+
+
+def getRandomMove(board, rules):
+    # let's make a random move
+    # First, make a list of all empty spots
+    validMoves = []
+    for col in range(rules.BOARDWIDTH):
+        for row in range(rules.BOARDHEIGHT):
+            if isValidMove(board, col, row):
+                validMoves.append((col, row))
+
+    return random.choice(validMoves)
+
+
+# player gives an implementation the basePlayer cl
+class randomPlayer:
+    def __init__(self, black_=True, rules=None):
+        self.black = black_
+        self.rules = rules if rules is not None else GmGameRules()
+
+        self.max_move_time_ns = 0
+        self.start_time_ns = 0
+
+    def new_game(self, black_):
+        self.black = black_
+
+    def move(self, gamestate, last_move, max_time_to_move=1000):
+        board = gamestate[0]
+        # ply=gamesate[1]
+
+        self.max_move_time_ns = 0.95 * max_time_to_move * 1000000  # ms to ns
+        self.start_time_ns = time.time_ns()
+
+        return getRandomMove(board, self.rules)
+
+    def id(self):
+        return "Marius"
+
+
+class gomoku_random_ai_webServer:
+    def move(self, dic):
+        # strData=strUrlEncodedData # urllib.parse.unquote(strUrlEncodedData)
+
+        # dic=json.loads(strData)
+
+        # the rules are per request: requests for different games may be handled at the same time.
+        rules = GmGameRules(dic["winningSeries"], dic["boardSize"])
+
+        gamestate = (dic["board"], dic["ply"])
+        last_move = dic["last_move"]
+        # we'll deriver valid_moves ourselves
+        player = randomPlayer(dic["black"], rules)
+
+        return player.move(gamestate, last_move, dic["max_time_to_move"])
@@ -1,19 +1,63 @@
 # a flask webserver that encapsulates a gomoku ai (as example a simple random AI)
-from flask import Flask, request, json, Response
+from flask import Flask, request, json, Response, g
 from bson import json_util
 import logging
+import struct
 
-import random, time
+import gomoku_wire
+from gomoku_metrics import TEXT_TYPE, server_metrics
+
+import time
+
+from gomoku_ai_random import gomoku_random_ai_webServer
 
 logging.basicConfig(filename="mylog.log")
 app = Flask(__name__)
+metrics = server_metrics()
+# the names of the endpoints in the metrics, the same as in gomoku_ai_async_webserver
+ENDPOINTS = {"make_gomoku_move_9g3": "move", "get_metrics": "metrics"}
+
+
+@app.before_request
+def start_request():
+    g.start_time = time.perf_counter()
+    metrics.request_started()
+
+
+@app.after_request
+def end_request(response):
+    metrics.request_done(
+        ENDPOINTS.get(request.endpoint, "other"),
+        response.status_code,
+        (time.perf_counter() - g.start_time) * 1000,
+    )
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(response=metrics.text(), status=200, content_type=TEXT_TYPE)
 
 
 @app.route("/make_gomoku_move/ai_random", methods=["POST"])
 def make_gomoku_move_9g3():
     # IncrementalStringDecode
-
-    data = request.json
+    start_time_ns = time.time_ns()
+
+    # the compact binary encoding, if the client asks for it. Otherwise json.
+    bBinary = request.mimetype == gomoku_wire.REQUEST_TYPE  # without parameters such as "; charset=..."
+    if bBinary:
+        try:
+            data = gomoku_wire.decode_request(request.get_data())
+        except (struct.error, ValueError) as error:
+            # e.g. a truncated request
+            return Response(
+                response=json.dumps({"Error": "invalid request: " + str(error)}),
+                status=400,
+                mimetype="application/json",
+            )
+    else:
+        data = request.json
     ar_error = []
 
     if data is None or data == {}:
@@ -28,89 +72,32 @@ def make_gomoku_move_9g3():
         )
 
     gomoku_ai = gomoku_random_ai_webServer()
+    move_start_time = time.perf_counter()
     move = gomoku_ai.move(data)
-
-    # dicResponse,ar_error = temptest(data)
-    # if(len(ar_error)!=0): return MongoAPI.returnErrors(ar_error)
-    dicResponse = {}
-    dicResponse["move"] = move
-    return Response(
-        response=json_util.dumps(dicResponse), status=200, mimetype="application/json"
+    metrics.move_done(
+        (time.perf_counter() - move_start_time) * 1000,
+        data.get("max_time_to_move"),
+        getattr(gomoku_ai, "playouts", None),
     )
 
-
-# ******************************************************
-# End of Flask part.  Below is the AI part.
-# ******************************************************
-
-
-class GmGameRules:
-    winningSeries = 5  # global class variable. will be overridden below.
-    BOARDWIDTH = 19
-    BOARDHEIGHT = 19
-
-
-def isValidMove(board, column, row):
-    # Returns True if there is an empty space in the given column.
-    # Otherwise returns False.
-    return (
-        (column >= 0)
-        and (column < len(board))
-        and (row >= 0)
-        and (row < len(board[0]))
-        and (board[column][row] == 0)
+    if bBinary:
+        response = Response(
+            response=gomoku_wire.encode_response(move),
+            status=200,
+            mimetype=gomoku_wire.RESPONSE_TYPE,
+        )
+    else:
+        # dicResponse,ar_error = temptest(data)
+        # if(len(ar_error)!=0): return MongoAPI.returnErrors(ar_error)
+        dicResponse = {}
+        dicResponse["move"] = move
+        response = Response(
+            response=json_util.dumps(dicResponse),
+            status=200,
+            mimetype="application/json",
+        )
+    # lets the client separate the time spent here from the network overhead.
+    response.headers["Server-Timing"] = "move;dur={:.1f}".format(
+        (time.time_ns() - start_time_ns) / 1000000
     )
-
-
-def getRandomMove(board):
-    # let's make a random move
-    # First, make a list of all empty spots
-    validMoves = []
-    for col in range(GmGameRules.BOARDWIDTH):
-        for row in range(GmGameRules.BOARDHEIGHT):
-            if isValidMove(board, col, row):
-                validMoves.append((col, row))
-
-    return random.choice(validMoves)
-
-
-# player gives an implementation the basePlayer cl
-class randomPlayer:
-    def __init__(self, black_=True):
-        self.black = black_
-
-        self.max_move_time_ns = 0
-        self.start_time_ns = 0
-
-    def new_game(self, black_):
-        self.black = black_
-
-    def move(self, gamestate, last_move, max_time_to_move=1000):
-        board = gamestate[0]
-        # ply=gamesate[1]
-
-        self.max_move_time_ns = 0.95 * max_time_to_move * 1000000  # ms to ns
-        self.start_time_ns = time.time_ns()
-
-        return getRandomMove(board)
-
-    def id(self):
-        return "Marius"
-
-
-class gomoku_random_ai_webServer:
-    def move(self, dic):
-        # strData=strUrlEncodedData # urllib.parse.unquote(strUrlEncodedData)
-
-        # dic=json.loads(strData)
-
-        GmGameRules.winningSeries = dic["winningSeries"]
-        GmGameRules.BOARDWIDTH = dic["boardSize"]
-        GmGameRules.BOARDHEIGHT = dic["boardSize"]
-
-        gamestate = (dic["board"], dic["ply"])
-        last_move = dic["last_move"]
-        # we'll deriver valid_moves ourselves
-        player = randomPlayer(dic["black"])
-
-        return player.move(gamestate, last_move, dic["max_time_to_move"])
+    return response
@@ -0,0 +1,213 @@
+# Benchmarks of the hot paths: the rules core (gomoku.move, check_win, is_game_over, valid_moves)
+# per call, and the MCTS of super_ai (iterations, rollouts and tree nodes per second at a fixed time budget).
+#
+# The boards are fixed (seeded), for 7x7, 15x15 and 19x19, at several stages of a game,
+# so two runs measure exactly the same work.
+# The results are written as json, and can be compared with a saved baseline: regressions (slower
+# by more than the threshold) are reported, and make the exit code 1, e.g. for a ci job.
+#
+# usage:
+#   python gomoku_benchmark.py -o baseline.json                 # save a baseline
+#   python gomoku_benchmark.py --compare baseline.json          # ...and later compare with it
+#   python gomoku_benchmark.py --sizes 7 --mcts-time 200 --only rules
+#   python gomoku_benchmark.py --only mcts --mcts-iterations 500   # the same mcts work every run
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import gomoku
+
+SIZES = (7, 15, 19)
+FILL_LEVELS = (0.1, 0.3, 0.6)  # the part of the board that is filled, per benchmark board
+SEED = 2024
+
+
+def make_boards(size, seed=SEED):
+    """The fixed benchmark positions for a board size: (state, last_move) per fill level.
+    Random, but without five in a row, so the games are still on."""
+    rng = np.random.default_rng(seed + size)
+    positions = []
+    for fill in FILL_LEVELS:
+        while True:
+            state = gomoku.starting_state(size)
+            cells = rng.permutation(size * size)[: max(1, int(fill * size * size))]
+            last_move = ()
+            for cell in cells:
+                last_move = (int(cell // size), int(cell % size))
+                state = gomoku.move(state, last_move)
+            if not gomoku.is_game_over(state):
+                break
+        positions.append((state, last_move))
+    return positions
+
+
+def time_per_call(function, nofCalls, repeats=5):
+    """The best time (ns) per call of function() over repeats runs of nofCalls calls.
+    The best run is the one that was disturbed least by the rest of the machine."""
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter_ns()
+        for _ in range(nofCalls):
+            function()
+        elapsed = (time.perf_counter_ns() - start_time) / nofCalls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_rules(size, positions, nofCalls):
+    results = {}
+    empty_cells = [
+        tuple(np.argwhere(state[0] == 0)[0]) for state, last_move in positions
+    ]
+
+    def run(name, make_call):
+        calls = [make_call(position, empty) for position, empty in zip(positions, empty_cells)]
+
+        def all_positions():
+            for call in calls:
+                call()
+
+        ns = time_per_call(all_positions, max(1, nofCalls // len(calls))) / len(calls)
+        results["{}/{}".format(name, size)] = {"ns_per_call": round(ns, 1)}
+
+    def move_call(position, empty):
+        board, ply = position[0]
+
+        def call():
+            gomoku.move((board, ply), empty)
+            board[empty] = 0  # undo, so every call does the same
+
+        return call
+
+    run("gomoku.move", move_call)
+    run("check_win", lambda position, empty: lambda: gomoku.check_win(position[0][0], position[1]))
+    run("is_game_over", lambda position, empty: lambda: gomoku.is_game_over(position[0]))
+    run("valid_moves", lambda position, empty: lambda: gomoku.valid_moves(position[0]))
+    return results
+
+
+def bench_mcts(size, positions, max_time_to_move, iterations_per_search=None, seed=SEED):
+    """With iterations_per_search, every search does a fixed number of iterations (with a seeded rng),
+    so exactly the same work is measured every run. Otherwise every search gets max_time_to_move."""
+    from super_ai.MCTS import MCTS
+    from super_ai.search_limit import search_limit
+
+    if iterations_per_search is not None:
+        name = "mcts/{}/{}it".format(size, iterations_per_search)
+    else:
+        name = "mcts/{}/{}ms".format(size, max_time_to_move)
+    iterations = nodes = 0
+    elapsed = 0.0
+    for state, last_move in positions:
+        limit = max_time_to_move
+        if iterations_per_search is not None:
+            limit = search_limit(iterations=iterations_per_search)
+        root = MCTS((state[0].copy(), state[1]), state[1] % 2 == 1, rng=random.Random(seed))
+        start_time = time.perf_counter()
+        root.best_move(limit)
+        elapsed += time.perf_counter() - start_time
+        iterations += root.playouts
+        nodes += root.nodes
+    # every iteration does one rollout: iterations_per_s is also the rollout rate
+    return {
+        name: {
+            "iterations_per_s": round(iterations / elapsed, 1),
+            "nodes_per_s": round(nodes / elapsed, 1),
+        }
+    }
+
+
+def warmup():
+    # compile the jitted functions first, so that is not measured
+    state, last_move = make_boards(7)[0]
+    gomoku.is_game_over(state)
+
+
+def run_benchmarks(sizes=SIZES, nofCalls=2000, mcts_time=500, only=None, mcts_iterations=None):
+    warmup()
+    results = {}
+    for size in sizes:
+        positions = make_boards(size)
+        if only in (None, "rules"):
+            results.update(bench_rules(size, positions, nofCalls))
+        if only in (None, "mcts"):
+            results.update(bench_mcts(size, positions, mcts_time, mcts_iterations))
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "sizes": list(sizes),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+# per metric: True if higher is better
+HIGHER_IS_BETTER = {
+    "ns_per_call": False,
+    "iterations_per_s": True,
+    "nodes_per_s": True,
+}
+
+
+def compare(baseline, current, threshold=0.1):
+    """Prints the change per metric. Returns the names of the metrics that got worse by more than threshold."""
+    regressions = []
+    print("{:<32} {:<18} {:>14} {:>14} {:>8}".format("benchmark", "metric", "baseline", "current", "change"))
+    for name, metrics in sorted(current["results"].items()):
+        for metric, value in metrics.items():
+            old = baseline["results"].get(name, {}).get(metric)
+            if old is None:
+                print("{:<32} {:<18} {:>14} {:>14.1f}".format(name, metric, "-", value))
+                continue
+            change = (value - old) / old if old else 0.0
+            worse = -change if HIGHER_IS_BETTER[metric] else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions.append(name + " " + metric)
+            print(
+                "{:<32} {:<18} {:>14.1f} {:>14.1f} {:>+7.1%}{}".format(
+                    name, metric, old, value, change, flag
+                )
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmarks of the gomoku rules and the mcts")
+    parser.add_argument("-o", "--output", help="write the results (json) to this file")
+    parser.add_argument("--compare", help="compare with this baseline (json)")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--calls", type=int, default=2000, help="calls per micro benchmark run")
+    parser.add_argument("--mcts-time", type=int, default=500, help="time budget (ms) per mcts search")
+    parser.add_argument(
+        "--mcts-iterations", type=int, help="iterations per mcts search, instead of a time budget (reproducible)"
+    )
+    parser.add_argument("--only", choices=["rules", "mcts"])
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.sizes, args.calls, args.mcts_time, args.only, args.mcts_iterations)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print("{} regression(s)".format(len(regressions)))
+            sys.exit(1)
+    elif not args.output:
+        print(json.dumps(current, indent=2))
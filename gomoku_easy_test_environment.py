@@ -140,24 +140,15 @@ v1.64 gomoku_ai_marius_tng_webclient toegevoegd
 v1.65 Bovenstaand alternatieve, eenvoudiger pseudocode toegevoegd.
 """
 
-import pygame
 import random
 import sys
 
-from pygame.locals import QUIT, MOUSEBUTTONUP
-
-import gomoku
-from GmGame import GmGame
-from GmGameRules import GmGameRules
-from GmQuickTests import GmQuickTests
 from GmUtils import GmUtils
 from basePlayer import basePlayer
 from gomoku import Move, GameState
-from gomoku_ai_marius1_webclient import gomoku_ai_marius1_webclient
-from gomoku_ai_marius_tng_webclient import (
-    gomoku_ai_marius_tng_webclient,
-)  # a bit better than marius1
-from super_ai.super_ai import super_ai
+
+# The gui (pygame), the webclients (requests) and the ai's are imported in the main script below and
+# in humanPlayer, not here: importing this module (e.g. for randomPlayer, in a worker process) is cheap.
 
 
 # player gives an implementation the basePlayer cl
@@ -198,6 +189,10 @@ class humanPlayer(basePlayer):
         self.black = black_
 
     def move(self, gamestate, last_move, max_time_to_move=1000):
+        import pygame
+        from pygame.locals import QUIT, MOUSEBUTTONUP
+        from GmGame import GmGame
+
         board = gamestate[0]
         tokenx, tokeny = None, None
         while True:
@@ -228,32 +223,49 @@ class humanPlayer(basePlayer):
             else:
                 GmGame.drawBoard(board)
 
-            pygame.display.update()
-            GmGame.FPSCLOCK.tick()
+            GmGame.updateDisplay()  # only the parts that changed
+            GmGame.FPSCLOCK.tick(GmGame.FPS)  # don't steal cpu time from a co-located ai
 
     def id(self):
         return "Marius"
 
 
-random.seed(0)  # voor reproduceerbare debugging
+if __name__ == "__main__":
+    from GmGame import GmGame
+    from GmGameRules import GmGameRules
+    from GmHeadlessGame import GmHeadlessGame
+    from GmQuickTests import GmQuickTests
+    from GmQuickTestRunner import GmQuickTestRunner
+    from gomoku_ai_marius1_webclient import gomoku_ai_marius1_webclient
+    from gomoku_ai_marius_tng_webclient import (
+        gomoku_ai_marius_tng_webclient,
+    )  # a bit better than marius1
+    from super_ai.super_ai import super_ai
+
+    random.seed(0)  # voor reproduceerbare debugging
+
+    humanPlayer1 = randomPlayer()
+    humanPlayer2 = randomPlayer()
+
+    random_ai = randomPlayer()
+    aiPlayer1 = gomoku_ai_marius1_webclient(
+        True, GmGameRules.winningSeries, GmGameRules.BOARDWIDTH
+    )
+    aiPlayer2 = gomoku_ai_marius_tng_webclient(
+        True, GmGameRules.winningSeries, GmGameRules.BOARDWIDTH
+    )
+    # aiPlayer1 = gomoku_ai_random_webclient(True,GmGameRules.winningSeries,GmGameRules.BOARDWIDTH)
 
-humanPlayer1 = randomPlayer()
-humanPlayer2 = randomPlayer()
+    # uncomment the line below to test again yourself as human (player1 is black and starts the game)
+    # don't specify an aiPlayer for Human vs Human games
+    # GmGame.start(player1=aiPlayer1, player2=super_ai(), max_time_to_move=1000, showIntermediateMoves=True)
 
-random_ai = randomPlayer()
-aiPlayer1 = gomoku_ai_marius1_webclient(
-    True, GmGameRules.winningSeries, GmGameRules.BOARDWIDTH
-)
-aiPlayer2 = gomoku_ai_marius_tng_webclient(
-    True, GmGameRules.winningSeries, GmGameRules.BOARDWIDTH
-)
-# aiPlayer1 = gomoku_ai_random_webclient(True,GmGameRules.winningSeries,GmGameRules.BOARDWIDTH)
+    # uncomment the line below to let two ai's play a batch of games without gui (they alternate colors).
+    # GmHeadlessGame.printResults(GmHeadlessGame.playGames(player1=super_ai(), player2=random_ai, max_time_to_move=1000, nofGames=10))
 
-# uncomment the line below to test again yourself as human (player1 is black and starts the game)
-# don't specify an aiPlayer for Human vs Human games
-# GmGame.start(player1=aiPlayer1, player2=super_ai(), max_time_to_move=1000, showIntermediateMoves=True)
 
+    # Uncomment the line below to run some simple tests for quick analysis and debugging.
+    GmQuickTests.doAllTests(super_ai())
 
-# Uncomment the line below to run some simple tests for quick analysis and debugging.
-# Important: before starting the GmQuickTests, make sure to set SIZE=7 in gomoku.py.
-GmQuickTests.doAllTests(super_ai())
+    # or run all tests many times (in parallel), for pass rates instead of a single pass/fail per test:
+    # GmQuickTestRunner.printResults(GmQuickTestRunner.runAll(super_ai, nofRuns=20, max_time_to_move=1000))
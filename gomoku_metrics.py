@@ -0,0 +1,132 @@
+# Instrumentation of the move servers (gomoku_ai_random_webserver and gomoku_ai_async_webserver):
+# latency histograms per endpoint, gauges for the requests in flight and the queue depth,
+# counters for the moves that took longer than their time budget, and the search throughput
+# that the ai's report. Exposed as plain text on GET /metrics, in the prometheus text format.
+#
+# Recording is cheap (a bisect and a few additions under a lock), so it is always on.
+#
+# An ai can report its search throughput by setting the attribute playouts (the number of
+# playouts/iterations of its last move) on the object that made the move.
+
+import bisect
+import threading
+import time
+
+# upper bounds of the latency buckets, in ms
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+TEXT_TYPE = "text/plain; version=0.0.4"
+
+
+class histogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += count
+            yield '{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, cumulative)
+        yield "{}_sum{{{}}} {:.3f}".format(name, labels, self.sum)
+        yield "{}_count{{{}}} {}".format(name, labels, self.count)
+
+
+class server_metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.latency = {}  # endpoint -> histogram of the server time in ms
+        self.responses = {}  # (endpoint, status) -> count
+        self.in_flight = 0
+        self.moves = 0
+        self.overruns = 0  # moves that took longer than max_time_to_move
+        self.playouts = 0
+        self.search_seconds = 0.0  # the time of the moves for which playouts were reported
+        self.gauges = {}  # name -> (help, function that returns the current value)
+
+    def add_gauge(self, name, help, function):
+        """A gauge whose value is read (by calling function) when the metrics are exposed,
+        e.g. the queue depth of the server."""
+        self.gauges[name] = (help, function)
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_done(self, endpoint, status, ms):
+        with self.lock:
+            self.in_flight -= 1
+            if endpoint not in self.latency:
+                self.latency[endpoint] = histogram()
+            self.latency[endpoint].observe(ms)
+            key = (endpoint, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def move_done(self, ms, max_time_to_move, playouts=None):
+        """ms: the time the move took in the server."""
+        with self.lock:
+            self.moves += 1
+            if max_time_to_move is not None and ms > max_time_to_move:
+                self.overruns += 1
+            if playouts is not None:
+                self.playouts += playouts
+                self.search_seconds += ms / 1000
+
+    def playouts_per_second(self):
+        return self.playouts / self.search_seconds if self.search_seconds > 0 else 0.0
+
+    def text(self):
+        """The metrics in the prometheus text format."""
+        with self.lock:
+            lines = [
+                "# HELP gomoku_uptime_seconds Time since the server started.",
+                "# TYPE gomoku_uptime_seconds gauge",
+                "gomoku_uptime_seconds {:.1f}".format(time.time() - self.start_time),
+                "# HELP gomoku_request_latency_ms Time spent in the server per request.",
+                "# TYPE gomoku_request_latency_ms histogram",
+            ]
+            for endpoint, hist in sorted(self.latency.items()):
+                lines.extend(hist.lines("gomoku_request_latency_ms", 'endpoint="{}"'.format(endpoint)))
+            lines += [
+                "# HELP gomoku_responses_total Responses per endpoint and status.",
+                "# TYPE gomoku_responses_total counter",
+            ]
+            for (endpoint, status), count in sorted(self.responses.items()):
+                lines.append(
+                    'gomoku_responses_total{{endpoint="{}",status="{}"}} {}'.format(endpoint, status, count)
+                )
+            lines += [
+                "# HELP gomoku_requests_in_flight Requests that are being handled.",
+                "# TYPE gomoku_requests_in_flight gauge",
+                "gomoku_requests_in_flight {}".format(self.in_flight),
+                "# HELP gomoku_moves_total Moves computed.",
+                "# TYPE gomoku_moves_total counter",
+                "gomoku_moves_total {}".format(self.moves),
+                "# HELP gomoku_move_overruns_total Moves that took longer than their max_time_to_move.",
+                "# TYPE gomoku_move_overruns_total counter",
+                "gomoku_move_overruns_total {}".format(self.overruns),
+                "# HELP gomoku_playouts_total Playouts reported by the ai's.",
+                "# TYPE gomoku_playouts_total counter",
+                "gomoku_playouts_total {}".format(self.playouts),
+                "# HELP gomoku_search_seconds_total Time of the moves for which playouts were reported.",
+                "# TYPE gomoku_search_seconds_total counter",
+                "gomoku_search_seconds_total {:.3f}".format(self.search_seconds),
+                "# HELP gomoku_playouts_per_second Average search throughput of the ai's.",
+                "# TYPE gomoku_playouts_per_second gauge",
+                "gomoku_playouts_per_second {:.1f}".format(self.playouts_per_second()),
+            ]
+        for name, (help, function) in sorted(self.gauges.items()):
+            lines += [
+                "# HELP {} {}".format(name, help),
+                "# TYPE {} gauge".format(name),
+                "{} {}".format(name, function()),
+            ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,360 @@
+import json
+import os
+import random
+import time
+from collections import deque
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+import gomoku
+import gomoku_wire
+
+
+class latency_estimator:
+    """Keeps track of the network overhead of the requests to a server: the round trip time
+    minus the time spent in the server. Combines a smoothed estimate (like tcp does) with the
+    99th percentile of the recent samples."""
+
+    def __init__(self, initialMs=600, nofSamples=100):
+        self.initialMs = initialMs  # used until there are measurements (see gomoku_webclient.connect)
+        self.samples = deque(maxlen=nofSamples)
+        self.smoothedMs = None
+        self.deviationMs = 0.0
+
+    def add(self, ms):
+        if self.smoothedMs is None:
+            self.smoothedMs = ms
+            self.deviationMs = ms / 2
+        else:
+            self.deviationMs = 0.75 * self.deviationMs + 0.25 * abs(self.smoothedMs - ms)
+            self.smoothedMs = 0.875 * self.smoothedMs + 0.125 * ms
+        self.samples.append(ms)
+
+    def percentile(self, p):
+        return float(np.percentile(self.samples, p))
+
+    def overheadMs(self):
+        """A pessimistic estimate of the overhead of the next request."""
+        if not self.samples:
+            return self.initialMs
+        return max(self.percentile(99), self.smoothedMs + 4 * self.deviationMs)
+
+
+def serverTimeMs(req):
+    """The time the server spent on the request, from its Server-Timing header (None if absent)."""
+    for metric in req.headers.get("Server-Timing", "").split(","):
+        for param in metric.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "dur":
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+    return None
+
+
+# gomoku_webclient is the common part of the webclients: players that let a web-based webserver
+# (see gomoku_ai_random_webserver and gomoku_ai_async_webserver) compute their moves.
+# A webclient only has to specify the url of its ai and its id.
+# The server can be changed per client (url_), or for all clients with the environment variable
+# GOMOKU_AI_SERVER, e.g. GOMOKU_AI_SERVER=http://127.0.0.1:5000 to use a local server (see local_ai_server.py).
+class gomoku_webclient:
+    url = ""  # e.g. "https://themave.pythonanywhere.com/make_gomoku_move/ai_random"
+
+    def __init__(
+        self,
+        black_=True,
+        winningSeries_=5,
+        boardSize_=int(gomoku.SIZE),
+        useSessions_=False,
+        useBinary_=False,
+        connectTimeoutMs_=1000,
+        safetyMarginMs_=50,
+        url_=None,
+    ):
+        if url_ is not None:
+            self.url = url_
+        elif os.environ.get("GOMOKU_AI_SERVER"):
+            # same api path, other server
+            path = self.url[self.url.index("/make_gomoku_move/") :]
+            self.url = os.environ["GOMOKU_AI_SERVER"].rstrip("/") + path
+
+        self.black = black_
+        self.winningSeries = winningSeries_
+        self.boardSize = boardSize_
+
+        # With sessions, the server keeps the board during a game, and only the last move is sent.
+        # Falls back to sending the full board if the server does not support sessions.
+        self.useSessions = useSessions_
+        self.sessionUrl = None
+        self.sessionPly = 0  # the ply of the next move in the session
+
+        # With binary, requests use the compact encoding of gomoku_wire instead of json.
+        # Falls back to json if the server does not support it.
+        self.useBinary = useBinary_
+
+        # One pooled keep-alive http session per client, so a move doesn't pay for a new tcp/tls handshake.
+        self.http = None
+        self.connectTimeoutMs = connectTimeoutMs_
+
+        # The server gets max_time_to_move minus the (measured) network overhead minus this margin.
+        # If it still doesn't answer in time, we make an emergency move ourselves.
+        self.latency = latency_estimator()
+        self.safetyMarginMs = safetyMarginMs_
+        self.deadline = None  # time.perf_counter() at which the current move must be done
+        self.nofEmergencyMoves = 0
+
+    def new_game(self, black_):
+        self.black = black_
+        self.closeSession()
+        self.connect()
+
+    def httpSession(self):
+        if self.http is None:
+            self.http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+            self.http.mount("http://", adapter)
+            self.http.mount("https://", adapter)
+        return self.http
+
+    def connect(self):
+        """Sets up the connection to the server in advance (it is kept alive), outside of the time of a move.
+        Until the first move is measured, its round trip is the estimate of the network overhead. It is not a
+        sample: it includes the tcp/tls handshake, and would shrink the server's time for the next 100 moves."""
+        try:
+            start_time = time.perf_counter()
+            self.httpSession().head(self.url, timeout=self.connectTimeoutMs / 1000)
+            self.latency.initialMs = (time.perf_counter() - start_time) * 1000
+        except requests.RequestException:
+            pass  # we'll see at the first move.
+
+    def move(self, gamestate, last_move, max_time_to_move=1000):
+        start_time = time.perf_counter()
+        self.deadline = start_time + (max_time_to_move - self.safetyMarginMs) / 1000
+
+        # So my server has less time because of the send request en receive response
+        # back and forth to Denver, Colorado. How much less is measured.
+        max_time_for_server_script = int(
+            max_time_to_move - self.latency.overheadMs() - self.safetyMarginMs
+        )
+        max_time_for_server_script = max(
+            max_time_for_server_script, max_time_to_move // 10
+        )
+
+        try:
+            if self.useSessions:
+                move = self.sessionMove(gamestate, last_move, max_time_for_server_script)
+                if move is not None:
+                    return move
+
+            # call the server using POST.
+            status, response = self.post(
+                self.url,
+                self.fullRequest(gamestate, last_move, max_time_for_server_script),
+            )
+            if status == 200:
+                return response["move"]
+        except (requests.RequestException, ValueError):
+            # too late (timeout), or no connection. The server's move is lost, and so is its session.
+            # The server may have used all of its time: only what is beyond that is network overhead
+            # (as in measure), else one slow answer would shrink the server's time for many moves.
+            overhead_ms = (time.perf_counter() - start_time) * 1000 - max_time_for_server_script
+            if overhead_ms > 0:
+                self.latency.add(overhead_ms)
+            self.sessionUrl = None
+
+        # better an emergency move than a forfeit.
+        self.nofEmergencyMoves += 1
+        return self.emergencyMove(gamestate, last_move)
+
+    def move_batch(self, jobs, max_time_to_move=1000, batchSize=1000):
+        """Lets the server compute the moves of many independent positions (see the batch api of
+        gomoku_ai_async_webserver). jobs: a list of (gamestate, last_move, black).
+        Yields (index of the job, move) as the results come in, which is not in the order of the jobs.
+        The move is None if the server could not compute it."""
+        url = self.url + "/batch"
+        for start in range(0, len(jobs), batchSize):
+            batch = {
+                "max_time_to_move": max_time_to_move,
+                "winningSeries": self.winningSeries,
+                "boardSize": self.boardSize,
+                "jobs": [
+                    {
+                        "board": self.convertToList(gamestate[0]),
+                        "ply": int(gamestate[1]),
+                        "last_move": self.convertToIntTuple(last_move),
+                        "black": black,
+                    }
+                    for gamestate, last_move, black in jobs[start : start + batchSize]
+                ],
+            }
+            # the read timeout is the time between two results: at least one job must finish in it.
+            with self.httpSession().post(
+                url,
+                json=batch,
+                stream=True,
+                timeout=(self.connectTimeoutMs / 1000, 10 * max_time_to_move / 1000 + 10),
+            ) as req:
+                req.raise_for_status()
+                for line in req.iter_lines():
+                    if line:
+                        result = json.loads(line)
+                        move = tuple(result["move"]) if "move" in result else None
+                        yield start + result["index"], move
+
+    def id(self):
+        return "webclient"
+
+    def fullRequest(self, gamestate, last_move, max_time_for_server_script):
+        # fill a dic with info to post.
+        dic = {}
+        dic["board"] = gamestate[0]  # converted by post(), depending on the encoding
+        dic["ply"] = int(gamestate[1])
+        dic["last_move"] = self.convertToIntTuple(
+            last_move
+        )  # (int8,int8) cannot properly be json serialised
+        dic["max_time_to_move"] = max_time_for_server_script
+        dic["winningSeries"] = self.winningSeries
+        dic["boardSize"] = self.boardSize
+        dic["black"] = self.black
+        return dic
+
+    def sessionMove(self, gamestate, last_move, max_time_for_server_script):
+        """Returns the move computed in the session, or None if the server does not support sessions."""
+        ply = int(gamestate[1])
+        if self.sessionUrl is not None and ply == self.sessionPly:
+            # only the move of the opponent is sent. The server knows the rest.
+            dic = {}
+            dic["last_move"] = self.convertToIntTuple(last_move)
+            dic["ply"] = ply
+            dic["max_time_to_move"] = max_time_for_server_script
+            status, response = self.post(self.sessionUrl, dic)
+            if status == 200:
+                self.sessionPly = ply + 2
+                return response["move"]
+            # 409: the server lost the session, or is out of sync. Start a new one.
+            self.sessionUrl = None
+
+        # (re)open the session, with the full board.
+        self.closeSession()
+        status, response = self.post(
+            self.url + "/session",
+            self.fullRequest(gamestate, last_move, max_time_for_server_script),
+        )
+        if status in (404, 405, 415):
+            self.useSessions = False  # not supported by this server
+        if status != 200:
+            return None  # e.g. a 503: this move without a session, the next one tries again
+        self.sessionUrl = self.url + "/session/" + response["session"]
+        self.sessionPly = ply + 2
+        return response["move"]
+
+    def timeout(self):
+        """(connect, read) timeout in seconds: don't wait any longer than the time that is left."""
+        if self.deadline is None:
+            return self.connectTimeoutMs / 1000
+        left = max(self.deadline - time.perf_counter(), 0.001)
+        return (min(self.connectTimeoutMs / 1000, left), left)
+
+    def measure(self, req, start_time, max_time_for_server_script):
+        """Adds the network overhead of a request to the latency estimate, if it can be determined."""
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        server_ms = serverTimeMs(req)
+        if server_ms is not None:
+            self.latency.add(max(elapsed_ms - server_ms, 0.0))
+        elif elapsed_ms >= max_time_for_server_script:
+            # assume the server used all of its time. If it answered earlier, we don't know.
+            self.latency.add(elapsed_ms - max_time_for_server_script)
+
+    def post(self, url, dic):
+        """Posts a request dic to url, in binary or json.
+        Returns the http status and the response as a dic (None if the status is not 200)."""
+        start_time = time.perf_counter()
+        if self.useBinary:
+            req = self.httpSession().post(
+                url,
+                data=gomoku_wire.encode_request(dic),
+                headers={"Content-Type": gomoku_wire.REQUEST_TYPE},
+                timeout=self.timeout(),
+            )
+            self.measure(req, start_time, dic["max_time_to_move"])
+            if req.headers.get("Content-Type", "").startswith(gomoku_wire.RESPONSE_TYPE):
+                return req.status_code, gomoku_wire.decode_response(req.content)
+            if req.status_code != 415:
+                return req.status_code, None  # understood, but failed (e.g. 409: session out of sync)
+            # 415 Unsupported Media Type: binary is not supported by this server. From now on, use json.
+            self.useBinary = False
+            start_time = time.perf_counter()
+
+        if "board" in dic:
+            dic = dict(dic)
+            dic["board"] = self.convertToList(
+                dic["board"]
+            )  # lists can be json serialised, opposed to numpy arrays,therefore convert first.
+        req = self.httpSession().post(url, json=dic, timeout=self.timeout())
+        self.measure(req, start_time, dic["max_time_to_move"])
+        if req.status_code != 200:
+            return req.status_code, None
+        response = req.json()
+        # json kent geen tuples. Die maakt er arrays van. Dus zelf even converteren naar een tuple.
+        response["move"] = tuple(response["move"])
+        return req.status_code, response
+
+    def closeSession(self):
+        if self.sessionUrl is not None:
+            try:
+                self.httpSession().delete(
+                    self.sessionUrl, timeout=self.connectTimeoutMs / 1000
+                )
+            except requests.RequestException:
+                pass  # the server will clean it up itself eventually.
+            self.sessionUrl = None
+
+    def emergencyMove(self, gamestate, last_move):
+        """A quick local move: win if possible, else block a win of the opponent,
+        else a random move next to the stones on the board."""
+        board = np.array(gamestate[0], dtype=np.int8)
+        ply = gamestate[1]
+        if ply == 1:
+            return gomoku.valid_moves((board, ply))[0]
+
+        # the empty cells next to a stone
+        occupied = board != 0
+        near = np.zeros_like(occupied)
+        near[1:, :] |= occupied[:-1, :]
+        near[:-1, :] |= occupied[1:, :]
+        near[:, 1:] |= occupied[:, :-1]
+        near[:, :-1] |= occupied[:, 1:]
+        near[1:, 1:] |= occupied[:-1, :-1]
+        near[:-1, :-1] |= occupied[1:, 1:]
+        near[1:, :-1] |= occupied[:-1, 1:]
+        near[:-1, 1:] |= occupied[1:, :-1]
+        candidates = [tuple(cell) for cell in np.argwhere(near & ~occupied)]
+        if not candidates:
+            return random.choice(gomoku.valid_moves((board, ply)))
+
+        own = 2 if ply % 2 == 1 else 1
+        for color in (own, 3 - own):
+            for move in candidates:
+                board[move] = color
+                bWin = gomoku.check_win(board, move)
+                board[move] = 0
+                if bWin:
+                    return (int(move[0]), int(move[1]))
+        move = random.choice(candidates)
+        return (int(move[0]), int(move[1]))
+
+    def convertToIntTuple(self, tup):
+        if tup == None or tup == ():
+            return None
+        else:
+            return (int(tup[0]), int(tup[1]))
+
+    def convertToList(self, board):
+        if type(board) == type([]):
+            return board  # no conversion needed
+        else:  # it must be a numpy array. Convert it to list:
+            # tolist converts e.g. int8 numpy types (which cannot be json serialised) to python ints.
+            return board.tolist()
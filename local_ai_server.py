@@ -0,0 +1,183 @@
+# A local stand-in for the remote ai servers, for offline testing and benchmarking of the whole
+# remote-agent path (webclient -> http -> server -> ai) on one machine.
+# It hosts any player class (with the basePlayer interface) behind the same http api as
+# gomoku_ai_random_webserver, using the asyncio server of gomoku_ai_async_webserver,
+# optionally with simulated network latency and jitter.
+#
+# usage:
+#   python local_ai_server.py --player super_ai.super_ai:super_ai --name ai_marius_tng --latency wan
+#   then run e.g. competition.py with GOMOKU_AI_SERVER=http://127.0.0.1:5000
+#   python local_ai_server.py --bench 200 --latency wan   to measure the overhead per move.
+#
+# In python:
+#   with local_ai_server({"ai_marius_tng": player_ai(super_ai)}, latency="lan") as server:
+#       client = gomoku_ai_marius_tng_webclient(url_=server.url("ai_marius_tng"))
+
+import argparse
+import asyncio
+import importlib
+import random
+import threading
+import time
+
+import numpy as np
+
+import gomoku
+from gomoku_ai_async_webserver import DEFAULT_AIS, gomoku_async_webServer
+
+# simulated network round trip times (ms): (base, jitter). The jitter is exponentially distributed,
+# which gives the long tail of real networks.
+LATENCY_PROFILES = {
+    "none": (0.0, 0.0),
+    "lan": (1.0, 0.5),
+    "wan": (40.0, 10.0),
+    "transatlantic": (150.0, 30.0),
+    "bad": (150.0, 150.0),
+}
+
+
+class player_ai:
+    """Makes a player class (basePlayer interface: new_game, move(state, last_move, max_time_to_move))
+    servable: calling it creates an object with the move(dic) interface of the servers.
+    In a session, that object (and so the player) is kept for the whole game."""
+
+    def __init__(self, player_class):
+        self.player_class = player_class
+
+    def __call__(self):
+        return _player_adapter(self.player_class())
+
+
+class _player_adapter:
+    def __init__(self, player):
+        self.player = player
+        self.black = None
+        self.playouts = None
+
+    def move(self, dic):
+        if dic["black"] != self.black:
+            self.black = dic["black"]
+            self.player.new_game(self.black)
+        board = np.array(dic["board"], dtype=np.int8)
+        last_move = tuple(dic["last_move"]) if dic["last_move"] else ()
+        move = self.player.move((board, dic["ply"]), last_move, dic["max_time_to_move"])
+        self.playouts = getattr(self.player, "playouts", None)  # for the metrics of the server
+        return move
+
+
+class local_ai_server(gomoku_async_webServer):
+    def __init__(
+        self, ais=None, port=0, workers=2, latency="none", host="127.0.0.1", seed=None
+    ):
+        """ais: as in gomoku_async_webServer, e.g. {"ai_marius_tng": player_ai(super_ai)}.
+        port 0 picks a free port. latency: the name of a LATENCY_PROFILES entry, or (base_ms, jitter_ms)."""
+        super().__init__(DEFAULT_AIS if ais is None else ais, workers, initializer=gomoku.warmup)
+        self.host = host
+        self.requested_port = port
+        self.latency = LATENCY_PROFILES[latency] if isinstance(latency, str) else latency
+        self.random = random.Random(seed)
+        self.loop = None
+        self.thread = None
+
+    async def network_delay(self):
+        base, jitter = self.latency
+        if base > 0 or jitter > 0:
+            delay = base + (self.random.expovariate(1 / jitter) if jitter > 0 else 0.0)
+            await asyncio.sleep(delay / 1000)
+
+    def start_in_background(self):
+        """Starts the server in a background thread. Returns the base url."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(
+            self.start(self.host, self.requested_port), self.loop
+        ).result()
+        return self.base_url()
+
+    async def shutdown(self):
+        self.close()
+        # also end the connections that are kept alive
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def stop(self):
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+
+    def base_url(self):
+        return "http://{}:{}".format(self.host, self.port())
+
+    def url(self, ai_name):
+        return self.base_url() + "/make_gomoku_move/" + ai_name
+
+    def __enter__(self):
+        self.start_in_background()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def load_player_class(spec):
+    """'module:Class' -> the class, e.g. 'super_ai.super_ai:super_ai'."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def benchmark(server, ai_name, nofMoves, max_time_to_move, bsize, **clientOptions):
+    """Lets a webclient request nofMoves moves on random positions and prints the time per move,
+    the part of it that was spent outside the server, and the number of emergency moves."""
+    from gomoku_webclient import gomoku_webclient
+
+    client = gomoku_webclient(True, 5, bsize, url_=server.url(ai_name), **clientOptions)
+    client.new_game(True)
+    rng = np.random.default_rng(0)
+    times = []
+    for _ in range(nofMoves):
+        board = rng.choice(np.array([0, 0, 0, 1, 2], dtype=np.int8), size=(bsize, bsize))
+        start_time = time.perf_counter()
+        client.move((board, 3), (0, 0), max_time_to_move)
+        times.append((time.perf_counter() - start_time) * 1000)
+    p50, p99 = np.percentile(times, [50, 99])
+    print(
+        "moves={} time per move: p50={:.1f}ms p99={:.1f}ms max={:.1f}ms, network overhead estimate={:.1f}ms, emergency moves={}".format(
+            nofMoves,
+            p50,
+            p99,
+            max(times),
+            client.latency.overheadMs(),
+            client.nofEmergencyMoves,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local stand-in for the remote gomoku ai servers")
+    parser.add_argument("--player", help="player class to serve, as module:Class")
+    parser.add_argument("--name", default="ai_random", help="served as /make_gomoku_move/<name>")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--latency", default="none", choices=sorted(LATENCY_PROFILES))
+    parser.add_argument("--bench", type=int, default=0, help="run a benchmark of this many moves")
+    parser.add_argument("--time", type=int, default=1000, help="max_time_to_move (ms) for the benchmark")
+    parser.add_argument("--bsize", type=int, default=19)
+    args = parser.parse_args()
+
+    ais = dict(DEFAULT_AIS)
+    if args.player:
+        ais[args.name] = player_ai(load_player_class(args.player))
+    server = local_ai_server(ais, args.port, args.workers, args.latency)
+    if args.bench:
+        with server:
+            benchmark(server, args.name, args.bench, args.time, args.bsize)
+    else:
+        print("serving on " + "http://127.0.0.1:{}".format(args.port))
+        asyncio.run(server.serve_forever("127.0.0.1", args.port))
@@ -1,14 +1,26 @@
 import copy
-import time
+import math
+import random
+from typing import Union
 
 import numpy as np
 
 import gomoku
 from gomoku import GameState
+from super_ai.search_limit import search_limit
+from super_ai.telemetry import timed_iteration
+
+
+# the weight of the prior in the puct selection (with a policy)
+C_PUCT = 1.5
 
 
 class MCTS:
-    def __init__(self, state: GameState, black, parent=None, move=None):
+    def __init__(self, state: GameState, black, parent=None, move=None, rng=None, policy=None, prior=1.0):
+        """rng: the random.Random for the rollouts (shared by the whole tree). Seed it for reproducible searches.
+        policy: an optional move prior (see pattern_policy.py), shared by the whole tree. With a policy, the moves
+        are selected with puct: the untried moves are expanded in the order of their prior, and a move with
+        a low prior is only tried once the better ones stop looking good. prior: the prior of this node's move."""
         self.state = state
         self.parent = parent
         self.move = move
@@ -18,45 +30,110 @@ class MCTS:
         self._untried_moves = gomoku.valid_moves(self.state)
         self._black = black
         self.qn_ratio = 0
-
-    def best_move(self, max_time_to_move: int = 1000) -> "MCTS":
+        self.playouts = 0  # of the last best_move search from this node
+        self.nodes = 0  # the nodes added in the last best_move search from this node
+        if rng is None:
+            rng = parent.rng if parent is not None else random.Random()
+        self.rng = rng
+        if policy is None and parent is not None:
+            policy = parent.policy
+        self.policy = policy
+        self.prior = prior
+        self._untried_priors = None  # in the order of _untried_moves, once the policy has been asked
+
+    def best_move(
+        self, max_time_to_move: Union[int, search_limit] = 1000, telemetry=None
+    ) -> "MCTS":
         """
-        max_time_to_move: the maximum time until the agent is required to make a move in milliseconds
+        max_time_to_move: the maximum time until the agent is required to make a move in milliseconds,
+        or a search_limit (by time, iterations and/or nodes).
+        telemetry: an optional search_telemetry, that records what the search did.
         """
-        start_time = time.time()
+        limit = max_time_to_move
+        if not isinstance(limit, search_limit):
+            limit = search_limit(time_ms=max_time_to_move)
+        limit.start()
+        self.playouts = 0
+        self.nodes = 0
+        if telemetry is not None:
+            telemetry.start_move()
         while True:
-            node = self._add_node_to_tree()
-            reward = node._rollout()
-            node._backpropagate(reward)
-
-            elapsed_time = (time.time() - start_time) * 1000
-            if elapsed_time > max_time_to_move:
+            times = telemetry.sample(self.playouts) if telemetry is not None else None
+            if times is not None:
+                new = timed_iteration(self, times)
+            else:
+                node = self._add_node_to_tree()
+                new = node._number_of_visits == 0
+                reward = node._rollout()
+                node._backpropagate(reward)
+            if new:
+                self.nodes += 1
+            self.playouts += 1
+
+            if limit.reached(self.playouts, self.nodes):
                 break
 
         best_node = self.children[0]
         for child in self.children:
             child.qn_ratio = child.q / child.number_of_visits()
-            if best_node.qn_ratio < child.qn_ratio:
+            if self.policy is not None:
+                # with puct the moves get very different numbers of visits: a move that was tried
+                # only a few times can have a high q/n by luck. The most visited move is the most reliable.
+                if best_node.number_of_visits() < child.number_of_visits():
+                    best_node = child
+            elif best_node.qn_ratio < child.qn_ratio:
                 best_node = child
 
+        if telemetry is not None:
+            telemetry.end_move(self, best_node, limit.elapsed_ms())
         return best_node
 
     def _add_node_to_tree(self) -> "MCTS":
         """
         if the current node in the tree is not a terminal node, it will expand the tree
         """
+        if self.policy is not None:
+            return self._add_node_puct()
         if not self.is_fully_expanded():
-            move = self._untried_moves.pop()
-            next_state = gomoku.move(copy.deepcopy(self.state), move)
-            assert next_state is not None, "Invalid move!"
-
-            child_node = MCTS(next_state, black=not self._black, parent=self, move=move)
-
-            self.children.append(child_node)
-            return child_node
+            return self._expand(self._untried_moves.pop())
 
         return self._best_child()
 
+    def _expand(self, move, prior=1.0) -> "MCTS":
+        next_state = gomoku.move(copy.deepcopy(self.state), move)
+        assert next_state is not None, "Invalid move!"
+
+        child_node = MCTS(
+            next_state, black=not self._black, parent=self, move=move, rng=self.rng, prior=prior
+        )
+
+        self.children.append(child_node)
+        return child_node
+
+    def _add_node_puct(self, c_puct=C_PUCT) -> "MCTS":
+        if self._untried_priors is None:
+            # all candidates in one call of the policy, sorted so the best one is popped first
+            priors = self.policy.priors(self.state[0], self.state[1], self._untried_moves)
+            order = np.argsort(priors, kind="stable")
+            self._untried_moves = [self._untried_moves[i] for i in order]
+            self._untried_priors = priors[order].tolist()
+
+        # puct: q/n + c * prior * sqrt(N) / (1 + n). An untried move has q/n = 0 and n = 0;
+        # only the untried move with the highest prior can be the best of them.
+        sqrt_visits = math.sqrt(self._number_of_visits)
+        best_node, best_value = None, -math.inf
+        for child in self.children:
+            visits = child._number_of_visits
+            value = child.q / visits + c_puct * child.prior * sqrt_visits / (1 + visits)
+            if value > best_value:
+                best_node, best_value = child, value
+        if self._untried_moves and (
+            best_node is None or c_puct * self._untried_priors[-1] * sqrt_visits >= best_value
+        ):
+            prior = self._untried_priors.pop()
+            return self._expand(self._untried_moves.pop(), prior)
+        return best_node
+
     def _backpropagate(self, reward: int) -> None:
         self._number_of_visits += 1
         self.q += reward
@@ -88,7 +165,7 @@ class MCTS:
             and untried_moves.__len__() != 0
             and not gomoku.is_game_over(current_rollout_state)
         ):
-            action = untried_moves.pop(np.random.randint(len(untried_moves)))
+            action = untried_moves.pop(self.rng.randrange(len(untried_moves)))
             current_rollout_state = gomoku.move(current_rollout_state, action)
 
         if current_rollout_state is None or action is None:
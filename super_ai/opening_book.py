@@ -0,0 +1,133 @@
+# An opening book: for positions early in the game, the moves that were played and how they scored.
+# Built from game logs (see game_log.py) or any other source of (position, move, score),
+# e.g. long offline searches, with book_builder.add.
+#
+# Positions are stored under their canonical key (see symmetry.py), so the 8 symmetric variants of a
+# position share their statistics, and the moves are stored on the canonical board. The keys of different
+# board sizes can be the same (the empty board has key 0 on every size), so an entry also has its board size.
+# On disk the book is one .npy file with a record per (position, move), sorted by key.
+# It is memory mapped, and a lookup is a binary search (np.searchsorted), so loading a book is instantaneous
+# and it costs no more memory than the pages that are used.
+#
+# usage: python -m super_ai.opening_book competition_games.log [more logs] -o super_ai/opening_book.npy [--plies 12]
+
+import argparse
+import os
+
+import numpy as np
+
+from gomoku import Board, Move
+from super_ai import symmetry
+
+ENTRY = np.dtype(
+    [
+        ("key", "<u8"),  # canonical key of the position
+        ("bsize", "u1"),  # the board size of the position
+        ("move", "<u2"),  # row * size + col, on the canonical board
+        ("games", "<u4"),
+        ("score", "<f4"),  # sum of the results for the player that made the move: 1 win, 0.5 draw, 0 loss
+    ]
+)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.npy")
+
+
+class opening_book:
+    def __init__(self, path: str = DEFAULT_PATH, min_games: int = 2):
+        """Memory maps the book at path. min_games: moves that were played less often are not trusted."""
+        self.entries = np.load(path, mmap_mode="r")
+        self.keys = self.entries["key"]
+        self.min_games = min_games
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, board: Board):
+        """The moves in the book for this position: a list of (move, games, score), on this board."""
+        key, t = symmetry.canonical_key(board)
+        start = np.searchsorted(self.keys, np.uint64(key), side="left")
+        end = np.searchsorted(self.keys, np.uint64(key), side="right")
+        size = board.shape[0]
+        back = symmetry.inverse(t)
+        result = []
+        for entry in self.entries[start:end]:
+            if entry["bsize"] != size:
+                continue  # the same key, on another board size
+            cell = int(entry["move"])
+            move = symmetry.transform_move((cell // size, cell % size), back, size)
+            result.append((move, int(entry["games"]), float(entry["score"])))
+        return result
+
+    def best_move(self, board: Board):
+        """The move with the best average score (of the moves played at least min_games times),
+        or None if the position is not in the book. The averages start from 1 in 2 (laplace),
+        so a move that was played often and scored well beats a single lucky game."""
+        best, best_rate = None, -1.0
+        for move, games, score in self.lookup(board):
+            if games < self.min_games or board[move] != 0:
+                continue
+            rate = (score + 1) / (games + 2)
+            if rate > best_rate:
+                best, best_rate = move, rate
+        return best
+
+
+class book_builder:
+    def __init__(self):
+        self.stats = {}  # (key, board size, canonical move) -> [games, score]
+
+    def add(self, board: Board, move: Move, score: float, games: int = 1):
+        """Adds the result (for the player to move) of move in the position on board."""
+        self.add_keyed(symmetry.position_keys(board.shape[0], board), move, score, games)
+
+    def add_keyed(self, keys: symmetry.position_keys, move: Move, score: float, games: int = 1):
+        """As add, for a position given by its (incrementally maintained) keys."""
+        row, col = keys.to_canonical(move)
+        stat = self.stats.setdefault((keys.canonical()[0], keys.size, row * keys.size + col), [0, 0.0])
+        stat[0] += games
+        stat[1] += score
+
+    def add_game(self, record, plies: int):
+        """Adds the first plies moves of a game record (see game_log.py).
+        Games that were not decided on the board (exceptions, illegal moves, overtime) are skipped."""
+        if record["reason"] not in ("win", "draw"):
+            return
+        keys = symmetry.position_keys(record["bsize"])
+        for k, move in enumerate(record["moves"][:plies]):
+            colour = "black" if k % 2 == 0 else "white"  # black makes the first move
+            if record["winner"] is None:
+                score = 0.5
+            else:
+                score = 1.0 if record["winner"] == colour else 0.0
+            move = (move[0], move[1])
+            self.add_keyed(keys, move, score)
+            keys.toggle(move, 2 if k % 2 == 0 else 1)
+
+    def add_games(self, paths, plies: int = 12):
+        from game_log import read_games
+
+        for path in paths:
+            for record in read_games(path):
+                self.add_game(record, plies)
+
+    def entries(self) -> np.ndarray:
+        entries = np.empty(len(self.stats), dtype=ENTRY)
+        for i, ((key, bsize, move), (games, score)) in enumerate(self.stats.items()):
+            entries[i] = (key, bsize, move, games, score)
+        return entries[np.argsort(entries["key"], kind="stable")]
+
+    def save(self, path: str = DEFAULT_PATH):
+        np.save(path, self.entries())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="builds an opening book from game logs")
+    parser.add_argument("logs", nargs="+", help="game logs, as written by competition.open_game_log")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    parser.add_argument("--plies", type=int, default=12, help="the number of moves per game in the book")
+    args = parser.parse_args()
+
+    builder = book_builder()
+    builder.add_games(args.logs, args.plies)
+    builder.save(args.output)
+    print("{} positions/moves written to {}".format(len(builder.stats), args.output))
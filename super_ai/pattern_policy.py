@@ -0,0 +1,225 @@
+# A move prior for the mcts: a linear (softmax) model over the line patterns around each empty cell.
+#
+# For every cell and each of the 4 directions, the pattern is the 8 cells around it on that line (4 on either
+# side), each empty, own stone (of the player to move), opponent stone or off the board: 4^8 patterns.
+# A pattern and its mirror image (the line read the other way) are the same feature. The logit of a cell is the
+# sum of the weights of its 4 patterns, and the prior of a move is the softmax of the logits over the candidates.
+# So it sees e.g. "completes a five", "blocks an open four" or "next to nothing" in one table lookup per direction.
+#
+# The weights are trained with numpy (adagrad, on mini-batches) to predict the root visit distributions of
+# self-play (see self_play.py), or the moves played in game logs (see game_log.py).
+# They are stored as one .npy file of 65536 float32's (256 kB).
+#
+# usage: python -m super_ai.pattern_policy --shards selfplay --size 7 [--logs games.log] -o super_ai/pattern_policy.npy
+
+import argparse
+import os
+
+import numpy as np
+
+from gomoku import Board, Move
+
+RADIUS = 4
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+EMPTY, OWN, OPPONENT, EDGE = 0, 1, 2, 3
+NOF_PATTERNS = 4 ** (2 * RADIUS)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern_policy.npy")
+
+
+def _mirror_table() -> np.ndarray:
+    # per pattern the lowest of the pattern and its mirror image (the digits in reverse order)
+    patterns = np.arange(NOF_PATTERNS)
+    mirrored = np.zeros(NOF_PATTERNS, dtype=np.int64)
+    rest = patterns
+    for _ in range(2 * RADIUS):
+        mirrored = mirrored * 4 + rest % 4
+        rest = rest // 4
+    return np.minimum(patterns, mirrored).astype(np.int32)
+
+
+CANONICAL = _mirror_table()
+
+
+def cell_patterns(boards, plies) -> np.ndarray:
+    """The patterns of all cells of a batch of boards ((n, size, size), for the player to move at plies):
+    an (n, size*size, 4) array of pattern indices, one per direction."""
+    boards = np.asarray(boards)
+    n, size = boards.shape[0], boards.shape[1]
+    me = np.where(np.asarray(plies) % 2 == 1, 2, 1).reshape(n, 1, 1)  # black (2) moves at odd plies
+    codes = np.full((n, size + 2 * RADIUS, size + 2 * RADIUS), EDGE, dtype=np.int32)
+    codes[:, RADIUS : RADIUS + size, RADIUS : RADIUS + size] = np.where(
+        boards == 0, EMPTY, np.where(boards == me, OWN, OPPONENT)
+    )
+    patterns = np.empty((n, size, size, len(DIRECTIONS)), dtype=np.int32)
+    for d, (dr, dc) in enumerate(DIRECTIONS):
+        index = np.zeros((n, size, size), dtype=np.int32)
+        for k in range(-RADIUS, RADIUS + 1):
+            if k == 0:
+                continue
+            row, col = RADIUS + k * dr, RADIUS + k * dc
+            index = index * 4 + codes[:, row : row + size, col : col + size]
+        patterns[..., d] = CANONICAL[index]
+    return patterns.reshape(n, size * size, len(DIRECTIONS))
+
+
+def softmax(logits: np.ndarray, legal: np.ndarray) -> np.ndarray:
+    """Row-wise softmax of logits over the legal cells (0 for the others)."""
+    logits = np.where(legal, logits, -np.inf)
+    logits = logits - logits.max(axis=1, keepdims=True)
+    p = np.exp(logits)
+    return p / p.sum(axis=1, keepdims=True)
+
+
+class pattern_policy:
+    def __init__(self, path: str = None):
+        """Loads the weights at path, or starts with all zeros (every move equally likely)."""
+        if path is not None:
+            self.weights = np.load(path).astype(np.float32)
+        else:
+            self.weights = np.zeros(NOF_PATTERNS, dtype=np.float32)
+
+    def logits(self, boards, plies) -> np.ndarray:
+        """(n, size*size) logits of all cells of a batch of boards (also of the occupied cells)."""
+        return self.weights[cell_patterns(boards, plies)].sum(axis=2)
+
+    def priors(self, board: Board, ply: int, moves) -> np.ndarray:
+        """The prior probabilities of moves (a list of empty cells) in the position, in one call."""
+        if len(moves) == 0:
+            return np.zeros(0, dtype=np.float32)  # a full board
+        size = board.shape[0]
+        logits = self.logits(board[np.newaxis], [ply])[0]
+        cells = np.array([move[0] * size + move[1] for move in moves], dtype=np.int64)
+        candidate_logits = logits[cells]
+        p = np.exp(candidate_logits - candidate_logits.max())
+        return p / p.sum()
+
+    def best_move(self, board: Board, ply: int) -> Move:
+        """The empty cell with the highest prior."""
+        size = board.shape[0]
+        logits = np.where(board.ravel() == 0, self.logits(board[np.newaxis], [ply])[0], -np.inf)
+        cell = int(np.argmax(logits))
+        return cell // size, cell % size
+
+    def save(self, path: str = DEFAULT_PATH):
+        np.save(path, self.weights)
+
+
+class policy_trainer:
+    def __init__(self, policy: pattern_policy, learning_rate: float = 0.1, l2: float = 1e-5):
+        """Trains policy (in place) with adagrad: every pattern gets its own step size, which suits
+        the sparse features (most patterns are rare)."""
+        self.policy = policy
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.squared_gradients = np.zeros(NOF_PATTERNS, dtype=np.float64)
+
+    def step(self, boards, plies, targets):
+        """One gradient step of the cross entropy between the policy and targets ((n, size*size)
+        distributions over the cells, e.g. root visits). Returns (loss, part of the positions in which
+        the most likely move of the policy is the most likely move of the target), before the step."""
+        boards = np.asarray(boards)
+        n = len(boards)
+        targets = np.asarray(targets, dtype=np.float64)
+        targets = targets / np.maximum(targets.sum(axis=1, keepdims=True), 1e-12)
+        patterns = cell_patterns(boards, plies)
+        legal = boards.reshape(n, -1) == 0
+        p = softmax(self.policy.weights[patterns].sum(axis=2), legal)
+        loss = -(targets * np.log(np.maximum(p, 1e-12))).sum(axis=1).mean()
+        accuracy = np.mean(np.argmax(p, axis=1) == np.argmax(targets, axis=1))
+
+        # d loss / d logit = p - target, and every pattern of a cell adds its weight to the logit of the cell
+        difference = (p - targets) / n
+        gradient = np.bincount(
+            patterns.ravel(),
+            weights=np.repeat(difference.ravel(), len(DIRECTIONS)),
+            minlength=NOF_PATTERNS,
+        )
+        gradient += self.l2 * self.policy.weights
+        self.squared_gradients += gradient * gradient
+        self.policy.weights -= (
+            self.learning_rate * gradient / (np.sqrt(self.squared_gradients) + 1e-8)
+        ).astype(np.float32)
+        return loss, accuracy
+
+    def train(self, batches, epochs: int = 1, report=print):
+        """batches: a function that returns an iterable of (boards, plies, targets), once per epoch
+        (e.g. lambda: shard_batches(directory, size)). Reports the average loss and accuracy per epoch."""
+        for epoch in range(epochs):
+            total_loss = total_accuracy = nofPositions = 0.0
+            for boards, plies, targets in batches():
+                loss, accuracy = self.step(boards, plies, targets)
+                total_loss += loss * len(boards)
+                total_accuracy += accuracy * len(boards)
+                nofPositions += len(boards)
+            if report is not None and nofPositions:
+                report(
+                    "epoch {}: loss {:.3f}, accuracy {:.1%} ({:.0f} positions)".format(
+                        epoch + 1, total_loss / nofPositions, total_accuracy / nofPositions, nofPositions
+                    )
+                )
+
+
+def shard_batches(directory: str, size: int, batch_size: int = 256, seed: int = 0):
+    """(boards, plies, targets) batches of the self-play records in directory, shard by shard
+    (memory mapped: one batch at a time is read), shuffled within a shard."""
+    from super_ai.self_play import load_shards, unpack_boards
+
+    rng = np.random.default_rng(seed)
+    for shard in load_shards(directory, size):
+        order = rng.permutation(len(shard))
+        for start in range(0, len(shard), batch_size):
+            records = shard[np.sort(order[start : start + batch_size])]
+            yield unpack_boards(records, size), records["ply"], records["visits"].astype(np.float32)
+
+
+def game_log_batches(paths, size: int, batch_size: int = 256):
+    """(boards, plies, targets) batches of the positions in game logs, with the move that was played as target.
+    Only the games on this board size that were decided on the board (won or drawn) are used."""
+    from game_log import read_games
+
+    boards, plies, targets = [], [], []
+    for path in paths:
+        for record in read_games(path):
+            if record["bsize"] != size or record["reason"] not in ("win", "draw"):
+                continue
+            board = np.zeros((size, size), dtype=np.int8)
+            for k, move in enumerate(record["moves"]):
+                ply = k + 1
+                if ply > 1:  # the first move is forced
+                    target = np.zeros(size * size, dtype=np.float32)
+                    target[move[0] * size + move[1]] = 1.0
+                    boards.append(board.copy())
+                    plies.append(ply)
+                    targets.append(target)
+                    if len(boards) == batch_size:
+                        yield np.array(boards), np.array(plies), np.array(targets)
+                        boards, plies, targets = [], [], []
+                board[move[0], move[1]] = 2 if ply % 2 == 1 else 1
+    if boards:
+        yield np.array(boards), np.array(plies), np.array(targets)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="trains the pattern policy (a move prior for the mcts)")
+    parser.add_argument("--shards", help="directory with self-play shards (see self_play.py)")
+    parser.add_argument("--logs", nargs="*", default=[], help="game logs, as written by competition.open_game_log")
+    parser.add_argument("--size", type=int, required=True, help="board size of the training positions")
+    parser.add_argument("-o", "--output", default=DEFAULT_PATH)
+    parser.add_argument("--init", help="continue training these weights")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=0.1)
+    parser.add_argument("--l2", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    def batches():
+        if args.shards:
+            yield from shard_batches(args.shards, args.size, args.batch_size)
+        if args.logs:
+            yield from game_log_batches(args.logs, args.size, args.batch_size)
+
+    policy = pattern_policy(args.init)
+    policy_trainer(policy, args.learning_rate, args.l2).train(batches, args.epochs)
+    policy.save(args.output)
+    print("weights written to {}".format(args.output))
@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+
+class search_limit:
+    """When a search has to stop: after a time (ms), a number of iterations, a number of new tree nodes,
+    or whichever of those comes first.
+    A limit without a time makes a search do exactly the same work on every machine and under any load
+    (together with a seeded rng), for profiling, benchmarks and regression tests.
+    NB: such a search can take longer than max_time_to_move. Don't use it in a competition."""
+
+    def __init__(
+        self,
+        time_ms: Optional[float] = None,
+        iterations: Optional[int] = None,
+        nodes: Optional[int] = None,
+    ):
+        if time_ms is None and iterations is None and nodes is None:
+            raise ValueError("a search_limit needs a time, iterations or nodes")
+        self.time_ms = time_ms
+        self.iterations = iterations
+        self.nodes = nodes
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start_time) * 1000
+
+    def reached(self, iterations: int, nodes: int) -> bool:
+        if self.iterations is not None and iterations >= self.iterations:
+            return True
+        if self.nodes is not None and nodes >= self.nodes:
+            return True
+        return self.time_ms is not None and self.elapsed_ms() > self.time_ms
+
+    def __repr__(self):
+        return "search_limit(time_ms={}, iterations={}, nodes={})".format(
+            self.time_ms, self.iterations, self.nodes
+        )
@@ -0,0 +1,252 @@
+# Self-play of the mcts of super_ai, as training data for policy priors and pattern weights.
+#
+# Many games are played in parallel worker processes. Per position (the forced first move excepted) a record
+# is written with the board, the ply (odd: black to move), the visit distribution of the root of the search
+# (the part of the visits that went to each cell) and the result of the game for the player to move
+# (1 win, 0 draw, -1 loss).
+#
+# The records go into shards: .npy files of at most shard_size records (a structured array, see record_dtype),
+# that are written as soon as they are full, so memory stays bounded by one shard, however many games are played.
+# The boards are packed with 2 bits per cell (as gomoku_wire.pack_board) and the visits are float16: a 19x19
+# record is 824 bytes, instead of 1.8 kB with an int8 board and float32 visits. Shards are not zipped,
+# so they can be memory mapped: load_shards(directory) costs no more memory than the pages that are read.
+# With augment, every position is also stored in its 7 symmetric variants (see symmetry.py).
+# With a policy (see pattern_policy.py), the searches use it as their prior: train, play, train again.
+#
+# usage: python -m super_ai.self_play -o selfplay --games 1000 --size 7 --time 200 [--iterations 2000] [--augment]
+
+import argparse
+import glob
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import gomoku
+from super_ai import symmetry
+from super_ai.MCTS import MCTS
+from super_ai.pattern_policy import pattern_policy
+from super_ai.search_limit import search_limit
+
+
+def record_dtype(size: int) -> np.dtype:
+    return np.dtype(
+        [
+            ("board", "u1", ((size * size + 3) // 4,)),  # 2 bits per cell, see gomoku_wire.pack_board
+            ("ply", "<u2"),  # odd: black (2) is to move
+            ("visits", "<f2", (size * size,)),  # the part of the root visits per cell (row * size + col)
+            ("result", "i1"),  # for the player to move: 1 win, 0 draw, -1 loss
+            ("game", "<u8"),  # the seed of the game, e.g. to split the data by game
+        ]
+    )
+
+
+def visit_distribution(root: MCTS, size: int) -> np.ndarray:
+    visits = np.zeros(size * size, dtype=np.float32)
+    for child in root.children:
+        visits[child.move[0] * size + child.move[1]] = child.number_of_visits()
+    return visits / max(visits.sum(), 1.0)
+
+
+def play_game(size, limit, seed, explore_plies=6, policy=None):
+    """Plays one game of the mcts against itself. Returns its records (see record_dtype).
+    limit: max_time_to_move (ms) or a search_limit, per move. In the first explore_plies plies the move is
+    drawn in proportion to the visits, so the games differ; after that the best move is played (as super_ai).
+    policy: an optional pattern_policy, the prior of the searches."""
+    rng = random.Random(seed)
+    state = gomoku.starting_state(size)
+    state = gomoku.move(state, gomoku.valid_moves(state)[0])  # the forced first move: nothing to learn
+    boards, plies, distributions = [], [], []
+    winner = 0  # 0: draw, else the value of the stones of the winner
+    while gomoku.valid_moves(state):
+        root = MCTS((state[0].copy(), state[1]), state[1] % 2 == 1, rng=rng, policy=policy)
+        best = root.best_move(limit)
+        visits = visit_distribution(root, size)
+        boards.append(state[0].copy())
+        plies.append(state[1])
+        distributions.append(visits)
+        move = best.move
+        if state[1] <= explore_plies:
+            cell = rng.choices(range(size * size), weights=visits)[0]
+            move = (cell // size, cell % size)
+        colour = 2 if state[1] % 2 else 1
+        state = gomoku.move(state, move)
+        if gomoku.check_win(state[0], move):
+            winner = colour
+            break
+
+    records = np.zeros(len(boards), dtype=record_dtype(size))
+    records["board"] = pack_boards(np.array(boards).reshape(len(boards), size * size))
+    records["ply"] = plies
+    records["visits"] = distributions
+    to_move = np.where(records["ply"] % 2 == 1, 2, 1)
+    records["result"] = 0 if winner == 0 else np.where(to_move == winner, 1, -1)
+    records["game"] = seed
+    return records
+
+
+def augment(records: np.ndarray, size: int) -> np.ndarray:
+    """The records followed by their 7 symmetric variants (board and visits transformed alike)."""
+    cells = unpack_boards(records, size).reshape(len(records), -1)
+    perms = symmetry.perms(size)
+    result = np.empty(len(records) * symmetry.NOF_TRANSFORMS, dtype=records.dtype)
+    transformed = np.empty_like(cells)
+    for t in range(symmetry.NOF_TRANSFORMS):
+        variant = result[t * len(records) : (t + 1) * len(records)]
+        variant[:] = records
+        # the stone and the visits of cell i go to the cell that cell i goes to
+        transformed[:, perms[t]] = cells
+        variant["board"] = pack_boards(transformed)
+        variant["visits"][:, perms[t]] = records["visits"]
+    return result
+
+
+def pack_boards(cells: np.ndarray) -> np.ndarray:
+    """An (n, size*size) array of cells (values 0, 1, 2) packed with 2 bits per cell, as gomoku_wire.pack_board."""
+    n = len(cells)
+    padded = np.zeros((n, (cells.shape[1] + 3) // 4 * 4), dtype=np.uint8)
+    padded[:, : cells.shape[1]] = cells
+    quads = padded.reshape(n, -1, 4)
+    return quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)
+
+
+def unpack_boards(records: np.ndarray, size: int) -> np.ndarray:
+    """The boards of records, as an (n, size, size) int8 array (values 0, 1, 2)."""
+    packed = records["board"]
+    cells = np.stack((packed & 3, (packed >> 2) & 3, (packed >> 4) & 3, packed >> 6), axis=2)
+    return cells.reshape(len(records), -1)[:, : size * size].reshape(-1, size, size).astype(np.int8)
+
+
+class shard_writer:
+    def __init__(self, directory: str, size: int, shard_size: int = 65536):
+        """Writes records to directory/selfplay-<size>-<number>.npy, shard_size records per shard.
+        Numbering continues after the shards that are already there, so a run can be resumed."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.buffer = np.zeros(shard_size, dtype=record_dtype(size))
+        self.used = 0
+        self.nofShards = len(glob.glob(os.path.join(directory, "selfplay-{}-*.npy".format(size))))
+        self.nofRecords = 0
+
+    def write(self, records: np.ndarray):
+        while len(records):
+            n = min(len(records), len(self.buffer) - self.used)
+            self.buffer[self.used : self.used + n] = records[:n]
+            self.used += n
+            records = records[n:]
+            if self.used == len(self.buffer):
+                self.flush()
+
+    def flush(self):
+        if self.used == 0:
+            return
+        path = os.path.join(self.directory, "selfplay-{}-{:05d}.npy".format(self.size, self.nofShards))
+        # via a temporary file, so a reader (or a crash) never sees half a shard
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, self.buffer[: self.used])
+        os.replace(path + ".tmp", path)
+        self.nofShards += 1
+        self.nofRecords += self.used
+        self.used = 0
+
+    def close(self):
+        self.flush()
+
+
+def load_shards(directory: str, size: int):
+    """Yields the shards in directory, memory mapped."""
+    for path in sorted(glob.glob(os.path.join(directory, "selfplay-{}-*.npy".format(size)))):
+        yield np.load(path, mmap_mode="r")
+
+
+def last_game(directory: str, size: int):
+    """The highest game seed in the shards in directory, or None if there are none."""
+    seeds = [int(shard["game"].max()) for shard in load_shards(directory, size) if len(shard)]
+    return max(seeds) if seeds else None
+
+
+# in a worker process: the prior of its searches, loaded once (by _init_worker) for all of its games
+_worker_policy = None
+
+
+def _init_worker(policy_path):
+    global _worker_policy
+    gomoku.warmup()
+    _worker_policy = pattern_policy(policy_path) if policy_path is not None else None
+
+
+# runs in a worker process
+def _play(size, limit, seed, explore_plies, bAugment):
+    records = play_game(size, limit, seed, explore_plies, _worker_policy)
+    return augment(records, size) if bAugment else records
+
+
+def generate(
+    directory,
+    nofGames,
+    size=gomoku.SIZE,
+    limit=1000,
+    workers=None,
+    seed=0,
+    explore_plies=6,
+    bAugment=False,
+    shard_size=65536,
+    maxPending=None,
+    policy_path=None,
+):
+    """Plays nofGames games (with seeds seed, seed+1, ...) in worker processes and writes their records
+    to shards in directory. The games are handed out a few at a time (maxPending, default 2 per worker),
+    so finished games are written while the rest is being played.
+    A resumed run (with shards in directory already) starts after the highest seed in them, if seed is not
+    beyond it: the same seed plays the same game, and would only duplicate the training data.
+    policy_path: the weights of the prior of the searches (see pattern_policy.py). Returns the number of records."""
+    workers = workers if workers is not None else os.cpu_count()
+    maxPending = maxPending if maxPending is not None else 2 * workers
+    previous = last_game(directory, size) if os.path.isdir(directory) else None
+    if previous is not None:
+        seed = max(seed, previous + 1)
+    writer = shard_writer(directory, size, shard_size)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(policy_path,)) as pool:
+        for nGame in range(nofGames):
+            pending.append(pool.submit(_play, size, limit, seed + nGame, explore_plies, bAugment))
+            while len(pending) > maxPending:
+                writer.write(pending.popleft().result())
+        while pending:
+            writer.write(pending.popleft().result())
+    writer.close()
+    return writer.nofRecords
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="self-play of the mcts, as training data")
+    parser.add_argument("-o", "--output", default="selfplay", help="directory for the shards")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, default=gomoku.SIZE)
+    parser.add_argument("--time", type=int, default=1000, help="max_time_to_move (ms)")
+    parser.add_argument("--iterations", type=int, help="iterations per search, instead of a time (reproducible)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: the number of cpu's)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game (resumed: after the last one)")
+    parser.add_argument("--explore-plies", type=int, default=6, help="plies in which moves are drawn by visits")
+    parser.add_argument("--augment", action="store_true", help="also store the 7 symmetric variants")
+    parser.add_argument("--shard-size", type=int, default=65536, help="records per shard")
+    parser.add_argument("--policy", help="the weights of the prior of the searches (see pattern_policy.py)")
+    args = parser.parse_args()
+
+    limit = search_limit(iterations=args.iterations) if args.iterations is not None else args.time
+    nofRecords = generate(
+        args.output,
+        args.games,
+        args.size,
+        limit,
+        args.workers,
+        args.seed,
+        args.explore_plies,
+        args.augment,
+        args.shard_size,
+        policy_path=args.policy,
+    )
+    print("{} records written to {}".format(nofRecords, args.output))
@@ -1,5 +1,12 @@
+import os
+import random
+
+import gomoku
 from gomoku import GameState, Move
 from super_ai.MCTS import MCTS
+from super_ai.opening_book import DEFAULT_PATH, opening_book
+from super_ai import pattern_policy
+from super_ai.search_limit import search_limit
 
 
 class super_ai:
@@ -9,9 +16,33 @@ class super_ai:
     your player
     """
 
-    def __init__(self, black_: bool = True):
-        """Constructor for the player."""
+    def __init__(
+        self,
+        black_: bool = True,
+        book_path: str = DEFAULT_PATH,
+        seed: int = None,
+        limit: search_limit = None,
+        telemetry=None,
+        policy_path: str = pattern_policy.DEFAULT_PATH,
+    ):
+        """Constructor for the player.
+        book_path: the opening book (see opening_book.py), if it exists. None: no book.
+        seed: seeds the player's own rng (the global ones are reseeded by the competition every move).
+        limit: a fixed search_limit for every move, instead of max_time_to_move. With a seed and a limit
+        without a time, every run does exactly the same work (for profiling and regression tests).
+        telemetry: an optional search_telemetry (see telemetry.py), that records what every search did.
+        policy_path: the move prior of the search (see pattern_policy.py), if it exists. None: no prior."""
         self.black = black_
+        self.rng = random.Random(seed)
+        self.limit = limit
+        self.telemetry = telemetry
+        self.playouts = 0
+        self.book = None
+        if book_path is not None and os.path.exists(book_path):
+            self.book = opening_book(book_path)
+        self.policy = None
+        if policy_path is not None and os.path.exists(policy_path):
+            self.policy = pattern_policy.pattern_policy(policy_path)
 
     def new_game(self, black_: bool):
         """At the start of each new game you will be notified by the competition.
@@ -19,6 +50,11 @@ class super_ai:
         will play black or white.
         """
         self.black = black_
+        self.warmup()
+
+    def warmup(self):
+        """Loads the compiled (numba) functions before the first timed move."""
+        gomoku.warmup()
 
     def move(
         self, state: GameState, last_move: Move, max_time_to_move: int = 1000
@@ -29,8 +65,19 @@ class super_ai:
         3) the available moves you can play (this is a special service we provide ;-) )
         4) the maximum time until the agent is required to make a move in milliseconds [diverging from this will lead to disqualification].
         """
-        root = MCTS(state, self.black)
-        best_node = root.best_move(max_time_to_move)
+        self.playouts = 0
+        if state[1] == 1:
+            return gomoku.valid_moves(state)[0]  # the only valid move: no need to search
+        if self.book is not None:
+            move = self.book.best_move(state[0])
+            if move is not None:
+                return move
+
+        root = MCTS(state, self.black, rng=self.rng, policy=self.policy)
+        best_node = root.best_move(
+            self.limit if self.limit is not None else max_time_to_move, self.telemetry
+        )
+        self.playouts = root.playouts  # reported to the metrics of the move servers
         return best_node.move
 
     def id(self) -> str:
@@ -0,0 +1,132 @@
+import numpy as np
+
+from gomoku import Board, Move
+
+# The 8 symmetries of a square board (the dihedral group): the rotations over 0, 90, 180 and 270 degrees,
+# without (0..3) and with (4..7) a transposition first. Transform t maps cell (row, col) to PERMS[t][row*size + col].
+
+NOF_TRANSFORMS = 8
+
+_perms = {}
+_zobrist = {}
+
+
+def _transform_index(index, t):
+    # applies transform t to an array of cell indices (of any shape)
+    if t >= 4:
+        index = index.T
+    return np.rot90(index, t % 4)
+
+
+def perms(size: int) -> np.ndarray:
+    """(8, size*size) array: perms(size)[t][i] is the cell that cell i goes to under transform t."""
+    if size not in _perms:
+        cells = np.arange(size * size).reshape(size, size)
+        result = np.empty((NOF_TRANSFORMS, size * size), dtype=np.int64)
+        for t in range(NOF_TRANSFORMS):
+            # the cell at position p of the transformed board came from cell transformed[p]
+            transformed = _transform_index(cells, t).ravel()
+            result[t][transformed] = np.arange(size * size)
+        _perms[size] = result
+    return _perms[size]
+
+
+def inverse(t: int) -> int:
+    """The transform that undoes transform t."""
+    # the rotations over 90 and 270 degrees are each other's inverse, the others are their own inverse
+    return {1: 3, 3: 1}.get(t, t)
+
+
+def transform_board(board: Board, t: int) -> Board:
+    return _transform_index(board, t).copy()
+
+
+def transform_move(move: Move, t: int, size: int) -> Move:
+    cell = perms(size)[t][move[0] * size + move[1]]
+    return int(cell // size), int(cell % size)
+
+
+def zobrist_table(size: int) -> np.ndarray:
+    """(size*size, 3) random 64 bit keys per cell and stone value (the keys for an empty cell are 0).
+    Fixed per board size, so keys (e.g. in an opening book on disk) stay valid between runs."""
+    if size not in _zobrist:
+        rng = np.random.default_rng(20211231 + size)
+        table = rng.integers(0, 2**63, size=(size * size, 3), dtype=np.int64).astype(np.uint64)
+        table[:, 0] = 0
+        _zobrist[size] = table
+    return _zobrist[size]
+
+
+def symmetric_keys(board: Board) -> np.ndarray:
+    """The zobrist keys of the 8 transformed boards (uint64 array, indexed by transform)."""
+    size = board.shape[0]
+    flat = np.asarray(board).ravel()
+    occupied = np.flatnonzero(flat)
+    if len(occupied) == 0:
+        return np.zeros(NOF_TRANSFORMS, dtype=np.uint64)
+    table = zobrist_table(size)
+    # the stone on cell i of the board lies on cell perms[t][i] of transformed board t
+    keys = table[perms(size)[:, occupied], flat[occupied]]
+    return np.bitwise_xor.reduce(keys, axis=1)
+
+
+def canonical_key(board: Board):
+    """Returns (key, t): the key that is the same for all 8 symmetric boards, and the transform
+    that maps the board to the canonical one (the one with the smallest key).
+    Moves on the board map to the canonical board with transform_move(move, t, size),
+    and back with transform_move(move, inverse(t), size)."""
+    keys = symmetric_keys(board)
+    t = int(np.argmin(keys))
+    return int(keys[t]), t
+
+
+def canonical_move(board: Board, move: Move):
+    """Returns (key, move on the canonical board). If the board itself is symmetric, the symmetric
+    variants of a move are equivalent, and they all get the same canonical move."""
+    return _canonical_move(symmetric_keys(board), move, board.shape[0])
+
+
+def _canonical_move(keys, move, size):
+    key = keys.min()
+    cells = perms(size)[np.flatnonzero(keys == key), move[0] * size + move[1]]
+    cell = int(cells.min())
+    return int(key), (cell // size, cell % size)
+
+
+class position_keys:
+    """The 8 zobrist keys of a board (one per symmetry, as symmetric_keys), kept up to date incrementally:
+    placing or removing a stone is 8 xors, instead of hashing the whole board.
+    For transposition tables, books and caches that share their entries between symmetric positions:
+    use canonical() as the key, and store moves with to_canonical / read them with from_canonical."""
+
+    def __init__(self, size: int, board: Board = None):
+        self.size = size
+        self.table = zobrist_table(size)
+        self.perms = perms(size)
+        if board is None:
+            self.keys = np.zeros(NOF_TRANSFORMS, dtype=np.uint64)
+        else:
+            self.keys = symmetric_keys(board)
+
+    def copy(self) -> "position_keys":
+        other = position_keys.__new__(position_keys)
+        other.size, other.table, other.perms = self.size, self.table, self.perms
+        other.keys = self.keys.copy()
+        return other
+
+    def toggle(self, move: Move, value: int):
+        """Places a stone of value (1 or 2) on move, or removes it if it was there (xor)."""
+        self.keys ^= self.table[self.perms[:, move[0] * self.size + move[1]], value]
+
+    def canonical(self):
+        """(key, t), as canonical_key(board)."""
+        t = int(np.argmin(self.keys))
+        return int(self.keys[t]), t
+
+    def to_canonical(self, move: Move) -> Move:
+        """The move on the canonical board (the same for all equivalent moves, see canonical_move)."""
+        return _canonical_move(self.keys, move, self.size)[1]
+
+    def from_canonical(self, move: Move) -> Move:
+        """A move on the canonical board, back on this board."""
+        return transform_move(move, inverse(self.canonical()[1]), self.size)
@@ -0,0 +1,109 @@
+# Telemetry of the search of super_ai: per move, what the search did and where its time went.
+#
+# usage:
+#   telemetry = search_telemetry(path="search_telemetry.log")       # json lines, one per move
+#   telemetry = search_telemetry(callback=print)                    # or any function of the record
+#   player = super_ai(telemetry=telemetry)
+#
+# A record: ply, iterations, elapsed_ms, iterations_per_s (every iteration is one rollout),
+# nodes (allocated in this search), tree_nodes, max_depth, avg_depth (of the nodes), branching
+# (average number of children of the expanded nodes), root_children (the most visited moves:
+# move, visits, q), chosen, and time_ms: the estimated time spent in select, expand, rollout and backprop.
+#
+# The phases are timed in one of every sample_every iterations only (and scaled up), so the timing
+# costs next to nothing. Without telemetry, the search only pays for one "is None" test per iteration.
+
+import json
+import time
+
+PHASES = ("select", "expand", "rollout", "backprop")
+
+
+def tree_statistics(root):
+    """(number of nodes, max depth, average depth, average number of children of the expanded nodes)"""
+    nodes = depth_sum = max_depth = expanded = children = 0
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        nodes += 1
+        depth_sum += depth
+        max_depth = max(max_depth, depth)
+        if node.children:
+            expanded += 1
+            children += len(node.children)
+            stack.extend((child, depth + 1) for child in node.children)
+    return nodes, max_depth, depth_sum / nodes, children / expanded if expanded else 0.0
+
+
+class search_telemetry:
+    def __init__(self, callback=None, path=None, sample_every=16, top_children=10):
+        """callback: called with the record of every move. path: the records are appended to this file (json lines)."""
+        self.callback = callback
+        self.file = open(path, "a") if path is not None else None
+        self.sample_every = sample_every
+        self.top_children = top_children
+        self.last = None  # the record of the last move
+        self.times = None
+        self.sampled = 0
+
+    def start_move(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.sampled = 0
+
+    def sample(self, iteration):
+        """The dict to add the phase times of this iteration to, or None if it isn't sampled."""
+        if iteration % self.sample_every == 0:
+            self.sampled += 1
+            return self.times
+        return None
+
+    def end_move(self, root, chosen, elapsed_ms):
+        iterations = root.playouts
+        scale = iterations / self.sampled if self.sampled else 0.0
+        tree_nodes, max_depth, avg_depth, branching = tree_statistics(root)
+        children = sorted(root.children, key=lambda child: child.number_of_visits(), reverse=True)
+        record = {
+            "ply": int(root.state[1]),
+            "iterations": iterations,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "iterations_per_s": round(iterations / elapsed_ms * 1000, 1) if elapsed_ms > 0 else 0.0,
+            "nodes": root.nodes,
+            "tree_nodes": tree_nodes,
+            "max_depth": max_depth,
+            "avg_depth": round(avg_depth, 2),
+            "branching": round(branching, 2),
+            "root_children": [
+                [[int(child.move[0]), int(child.move[1])], child.number_of_visits(), child.q]
+                for child in children[: self.top_children]
+            ],
+            "chosen": [int(chosen.move[0]), int(chosen.move[1])],
+            "time_ms": {phase: round(self.times[phase] * scale * 1000, 1) for phase in PHASES},
+        }
+        self.last = record
+        if self.callback is not None:
+            self.callback(record)
+        if self.file is not None:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+        return record
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def timed_iteration(root, times):
+    """One iteration of the search from root, with the time per phase added to times."""
+    start = time.perf_counter()
+    node = root._add_node_to_tree()
+    new = node._number_of_visits == 0
+    expanded = time.perf_counter()
+    reward = node._rollout()
+    rolled_out = time.perf_counter()
+    node._backpropagate(reward)
+    done = time.perf_counter()
+    times["expand" if new else "select"] += expanded - start
+    times["rollout"] += rolled_out - expanded
+    times["backprop"] += done - rolled_out
+    return new